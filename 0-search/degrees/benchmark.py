@@ -0,0 +1,459 @@
+"""
+Benchmarks for the degrees project.
+
+Usage: python benchmark.py <benchmark> [options]
+Run with --help for the list of benchmarks.
+"""
+
+import argparse
+import csv
+import gc
+import json
+import multiprocessing
+import os
+import random
+import time
+import tracemalloc
+
+import degrees
+import graph
+import synthetic
+import util
+
+
+def measure(fn, *args, **kwargs):
+    """
+    Calls fn and returns (result, seconds, retained bytes, peak bytes).
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, current, peak
+
+
+def reset():
+    """Clears everything degrees.load_data populated."""
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+    degrees.tree_cache.clear()
+    degrees.name_index = None
+    degrees.component_index = None
+    gc.collect()
+
+
+def mib(n):
+    return f"{n / 2 ** 20:9.2f} MiB"
+
+
+def bench_load(args):
+    """Compares load time and memory of the dicts and the CSR graph."""
+    print(f"{'representation':<16}{'load':>10}{'retained':>14}{'peak':>14}")
+    runs = (
+        ("dicts", False, False),
+        ("csr", True, False),
+        ("csr snapshot", True, True),
+    )
+    for label, compact, snapshot in runs:
+        reset()
+        if snapshot:
+            # Make sure the snapshot exists so the timed run maps it
+            degrees.load_data(args.directory, compact=True)
+            reset()
+        _, elapsed, current, peak = measure(
+            degrees.load_data, args.directory,
+            compact=compact, snapshot=snapshot
+        )
+        print(f"{label:<16}{elapsed:9.3f}s{mib(current):>14}{mib(peak):>14}")
+        if compact:
+            print(f"{'  csr buffers':<26}{mib(degrees.graph.nbytes()):>14}")
+    reset()
+
+
+def counting(neighbors):
+    """
+    Wraps a neighbors function so the number of expanded states
+    is available as the wrapper's `count` attribute.
+    """
+    def wrapper(state):
+        wrapper.count += 1
+        return neighbors(state)
+    wrapper.count = 0
+    return wrapper
+
+
+def sample_pairs(ids, n, seed):
+    rng = random.Random(seed)
+    return [(rng.choice(ids), rng.choice(ids)) for _ in range(n)]
+
+
+def bench_search(args):
+    """Compares states explored and time per query across search modes."""
+    reset()
+    degrees.load_data(args.directory, compact=args.compact)
+    if args.costars:
+        degrees.use_costars()
+    if degrees.graph is not None:
+        ids = list(range(degrees.graph.num_people))
+    else:
+        ids = list(degrees.people)
+    neighbors = degrees.search_neighbors()
+    pairs = sample_pairs(ids, args.queries, args.seed)
+
+    print(f"{'mode':<16}{'explored':>12}{'ms/query':>12}")
+    for mode in args.modes:
+        search = degrees.SEARCHES[mode]
+        counter = counting(neighbors)
+        start = time.perf_counter()
+        for source, target in pairs:
+            search(source, target, counter)
+        elapsed = time.perf_counter() - start
+        print(f"{mode:<16}{counter.count / len(pairs):12.1f}"
+              f"{1000 * elapsed / len(pairs):12.3f}")
+    reset()
+
+
+def bench_frontier(args):
+    """Compares per-operation cost of the list and deque frontiers."""
+    frontiers = (
+        ("StackFrontier", util.StackFrontier),
+        ("FastStackFrontier", util.FastStackFrontier),
+        ("QueueFrontier", util.QueueFrontier),
+        ("FastQueueFrontier", util.FastQueueFrontier),
+    )
+    print(f"{'frontier':<20}{'size':>10}"
+          f"{'add us':>10}{'contains us':>14}{'remove us':>12}")
+    for size in args.sizes:
+        nodes = [util.Node(state=i, parent=None, action=None)
+                 for i in range(size)]
+        probes = range(size - 1, size - 1 - min(args.probes, size), -1)
+        for label, cls in frontiers:
+            frontier = cls()
+            start = time.perf_counter()
+            for node in nodes:
+                frontier.add(node)
+            add = (time.perf_counter() - start) / size
+
+            # Probe the states furthest from the scan start
+            start = time.perf_counter()
+            for state in probes:
+                frontier.contains_state(state)
+            contains = (time.perf_counter() - start) / len(probes)
+
+            start = time.perf_counter()
+            for _ in probes:
+                frontier.remove()
+            remove = (time.perf_counter() - start) / len(probes)
+
+            print(f"{label:<20}{size:>10}{1e6 * add:10.3f}"
+                  f"{1e6 * contains:14.3f}{1e6 * remove:12.3f}")
+        del nodes
+
+
+def bench_batch(args):
+    """Times batches of queries sharing a source, cold and cached."""
+    reset()
+    degrees.load_data(args.directory, compact=args.compact)
+    if degrees.graph is not None:
+        ids = [degrees.graph.person_id(p)
+               for p in range(degrees.graph.num_people)]
+    else:
+        ids = list(degrees.people)
+    rng = random.Random(args.seed)
+    sources = [rng.choice(ids) for _ in range(args.sources)]
+
+    print(f"{'mode':<16}{'ms/query':>12}")
+    for mode in ("bfs", "tree"):
+        degrees.tree_cache.clear()
+        queries = 0
+        start = time.perf_counter()
+        for source in sources:
+            for target in rng.sample(ids, min(args.targets, len(ids))):
+                degrees.shortest_path(source, target, mode=mode)
+                queries += 1
+        elapsed = time.perf_counter() - start
+        print(f"{mode:<16}{1000 * elapsed / queries:12.3f}")
+    print("tree cache:", degrees.tree_cache.info())
+    reset()
+
+
+def bench_nodes(args):
+    """Compares peak memory and nodes/sec of Node-based and flat BFS."""
+    reset()
+    degrees.load_data(args.directory, compact=args.compact, components=False)
+    if args.costars:
+        degrees.use_costars(eager=True)
+    if degrees.graph is not None:
+        ids = list(range(degrees.graph.num_people))
+    else:
+        ids = list(degrees.people)
+    pairs = sample_pairs(ids, args.queries, args.seed)
+
+    print(f"{'mode':<12}{'nodes/sec':>14}{'max peak':>14}")
+    for mode in args.modes:
+        search = degrees.SEARCHES[mode]
+        counter = counting(degrees.search_neighbors())
+        start = time.perf_counter()
+        for source, target in pairs:
+            search(source, target, counter)
+        elapsed = time.perf_counter() - start
+        explored = counter.count
+
+        # Memory is traced in a second pass so tracing does not skew timing
+        peak = max(
+            measure(search, source, target, counter)[3]
+            for source, target in pairs
+        )
+        print(f"{mode:<12}{explored / elapsed:14.0f}{mib(peak):>14}")
+    reset()
+
+
+def bench_ingest(args):
+    """Compares stars.csv parsing throughput of DictReader and read_stars."""
+    path = os.path.join(args.directory, "stars.csv")
+
+    def dict_reader():
+        rows = 0
+        with open(path, encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                row["person_id"], row["movie_id"]
+                rows += 1
+        return rows
+
+    runs = [("DictReader", dict_reader)]
+    for workers in args.workers:
+        runs.append((
+            f"read_stars x{workers}",
+            lambda workers=workers: sum(
+                len(ids) for ids, _ in graph.read_stars(args.directory, workers)
+            )
+        ))
+
+    print(f"{'loader':<20}{'rows':>12}{'seconds':>10}{'rows/sec':>14}")
+    for label, fn in runs:
+        start = time.perf_counter()
+        rows = fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<20}{rows:>12}{elapsed:10.3f}{rows / elapsed:14.0f}")
+
+
+def bench_names(args):
+    """Times name index construction and exact/prefix/fuzzy lookups."""
+    reset()
+    degrees.load_data(args.directory, compact=args.compact)
+    _, elapsed, current, _ = measure(degrees.build_name_index)
+    print(f"index built in {elapsed:.3f}s, {mib(current).strip()}")
+    index = degrees.name_index
+
+    rng = random.Random(args.seed)
+    keys = rng.choices(index.keys, k=args.queries)
+    typo = [key[:i] + key[i + 1:] for key in keys
+            for i in [rng.randrange(len(key))] if key]
+    lookups = (
+        ("exact", index.exact, keys),
+        ("prefix", index.prefix, [key[:max(1, len(key) // 2)] for key in keys]),
+        ("fuzzy", index.fuzzy, typo),
+        ("search", index.search, typo),
+    )
+    print(f"{'lookup':<12}{'ms/query':>12}")
+    for label, fn, queries in lookups:
+        start = time.perf_counter()
+        for query in queries:
+            fn(query)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12}{1000 * elapsed / len(queries):12.3f}")
+    reset()
+
+
+def bench_components(args):
+    """Times component labelling and reports component size statistics."""
+    reset()
+    degrees.load_data(args.directory, compact=args.compact, components=False)
+    _, elapsed, current, _ = measure(degrees.build_components)
+    stats = degrees.component_index.stats(args.top)
+    print(f"labelled in {elapsed:.3f}s, {mib(current).strip()}")
+    print(f"components: {stats['components']}")
+    print(f"singletons: {stats['singletons']}")
+    print(f"largest:    {', '.join(map(str, stats['largest']))}")
+    reset()
+
+
+def peak_rss():
+    """
+    Returns this process's peak resident set size in bytes, or None
+    where the resource module is missing (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentiles(samples, qs=(50, 90, 99)):
+    ordered = sorted(samples)
+    return {
+        f"p{q}": ordered[max(0, -(-q * len(ordered) // 100) - 1)]
+        for q in qs
+    }
+
+
+def suite_case(directory, compact, modes, queries, seed):
+    """
+    Loads directory and runs queries per search mode in this process,
+    returning a dict of measurements. Meant to run in a fresh process
+    so peak RSS belongs to this case alone.
+    """
+    # Always parse, so the load time does not depend on a snapshot left
+    # by an earlier run, and leave out component labelling
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact, snapshot=False,
+                      components=False)
+    load = time.perf_counter() - start
+    case = {
+        "directory": directory,
+        "representation": "csr" if compact else "dicts",
+        "load_seconds": load,
+        "load_peak_rss": peak_rss(),
+        "modes": {},
+    }
+    if degrees.graph is not None:
+        ids = list(range(degrees.graph.num_people))
+    else:
+        ids = list(degrees.people)
+    pairs = sample_pairs(ids, queries, seed)
+    for mode in modes:
+        search = degrees.SEARCHES[mode]
+        counter = counting(degrees.search_neighbors())
+        latencies = []
+        for source, target in pairs:
+            start = time.perf_counter()
+            search(source, target, counter)
+            latencies.append(time.perf_counter() - start)
+        case["modes"][mode] = {
+            "explored": counter.count / len(pairs),
+            "latency": percentiles(latencies),
+        }
+    case["peak_rss"] = peak_rss()
+    return case
+
+
+def bench_suite(args):
+    """Generates synthetic datasets and measures load and search at scale."""
+    context = multiprocessing.get_context("spawn")
+    cases = []
+    for edges in args.edges:
+        directory = os.path.join(args.data, str(edges))
+        if not os.path.exists(os.path.join(directory, "stars.csv")):
+            print(f"Generating {edges} credits in {directory}...")
+            synthetic.generate(directory, edges, args.seed)
+        for compact in (False, True):
+            with context.Pool(1) as pool:
+                cases.append(pool.apply(suite_case, (
+                    directory, compact, args.modes, args.queries, args.seed
+                )))
+
+    print(f"{'dataset':<24}{'repr':<7}{'load':>9}{'rss':>14}"
+          f"{'mode':>15}{'explored':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    for case in cases:
+        first = True
+        for mode, stats in case["modes"].items():
+            rss = "n/a" if case["peak_rss"] is None else mib(case["peak_rss"])
+            prefix = (f"{case['directory']:<24}{case['representation']:<7}"
+                      f"{case['load_seconds']:8.3f}s{rss:>14}"
+                      if first else " " * 54)
+            first = False
+            print(f"{prefix}{mode:>15}{stats['explored']:11.1f}"
+                  f"{1000 * stats['latency']['p50']:9.3f}"
+                  f"{1000 * stats['latency']['p99']:9.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(cases, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    load = sub.add_parser("load", help=bench_load.__doc__)
+    load.add_argument("directory", nargs="?", default="large")
+    load.set_defaults(run=bench_load)
+
+    search = sub.add_parser("search", help=bench_search.__doc__)
+    search.add_argument("directory", nargs="?", default="large")
+    search.add_argument("--compact", action="store_true")
+    search.add_argument("--costars", action="store_true")
+    search.add_argument("--queries", type=int, default=100)
+    search.add_argument("--seed", type=int, default=0)
+    search.add_argument("--modes", nargs="+", choices=degrees.SEARCHES,
+                        default=list(degrees.SEARCHES))
+    search.set_defaults(run=bench_search)
+
+    batch = sub.add_parser("batch", help=bench_batch.__doc__)
+    batch.add_argument("directory", nargs="?", default="large")
+    batch.add_argument("--compact", action="store_true")
+    batch.add_argument("--sources", type=int, default=10)
+    batch.add_argument("--targets", type=int, default=100)
+    batch.add_argument("--seed", type=int, default=0)
+    batch.set_defaults(run=bench_batch)
+
+    nodes = sub.add_parser("nodes", help=bench_nodes.__doc__)
+    nodes.add_argument("directory", nargs="?", default="large")
+    nodes.add_argument("--compact", action="store_true")
+    nodes.add_argument("--costars", action="store_true")
+    nodes.add_argument("--queries", type=int, default=20)
+    nodes.add_argument("--seed", type=int, default=0)
+    nodes.add_argument("--modes", nargs="+", choices=degrees.SEARCHES,
+                       default=["bfs", "flat"])
+    nodes.set_defaults(run=bench_nodes)
+
+    ingest = sub.add_parser("ingest", help=bench_ingest.__doc__)
+    ingest.add_argument("directory", nargs="?", default="large")
+    ingest.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    ingest.set_defaults(run=bench_ingest)
+
+    names = sub.add_parser("names", help=bench_names.__doc__)
+    names.add_argument("directory", nargs="?", default="large")
+    names.add_argument("--compact", action="store_true")
+    names.add_argument("--queries", type=int, default=1000)
+    names.add_argument("--seed", type=int, default=0)
+    names.set_defaults(run=bench_names)
+
+    components = sub.add_parser("components", help=bench_components.__doc__)
+    components.add_argument("directory", nargs="?", default="large")
+    components.add_argument("--compact", action="store_true")
+    components.add_argument("--top", type=int, default=5)
+    components.set_defaults(run=bench_components)
+
+    suite = sub.add_parser("suite", help=bench_suite.__doc__)
+    suite.add_argument("--edges", type=int, nargs="+",
+                       default=[10 ** 4, 10 ** 5, 10 ** 6])
+    suite.add_argument("--data", default="synthetic-data",
+                       help="directory for generated datasets")
+    suite.add_argument("--queries", type=int, default=50)
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--modes", nargs="+", choices=degrees.SEARCHES,
+                       default=["bfs", "bidirectional"])
+    suite.add_argument("--json", help="also write the results to this file")
+    suite.set_defaults(run=bench_suite)
+
+    frontier = sub.add_parser("frontier", help=bench_frontier.__doc__)
+    frontier.add_argument("--sizes", type=int, nargs="+",
+                          default=[10 ** 4, 10 ** 5, 10 ** 6])
+    frontier.add_argument("--probes", type=int, default=100,
+                          help="contains_state and remove calls per size")
+    frontier.set_defaults(run=bench_frontier)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Connected components of the co-star graph, labelled with union-find.
+
+Two people are in the same component when a chain of shared movies links
+them, so a label comparison answers "not connected" without a search.
+"""
+
+from array import array
+from collections import Counter
+
+from graph import position, state_index
+
+
+class UnionFind():
+    """
+    Disjoint sets over positions 0..n-1 with union by size and path halving.
+    """
+
+    def __init__(self, n):
+        self.parent = array("i", range(n))
+        self.size = array("i", [1]) * n
+
+    @classmethod
+    def from_arrays(cls, parent, size):
+        """
+        Wraps existing parent and size arrays. Once compress has run,
+        lookups never write, so they may be read-only memoryviews; they
+        are copied on the first union or add.
+        """
+        sets = cls.__new__(cls)
+        sets.parent = parent
+        sets.size = size
+        return sets
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            grandparent = parent[parent[i]]
+            if grandparent != parent[i]:
+                parent[i] = grandparent
+            i = grandparent
+        return i
+
+    def compress(self):
+        """Points every position straight at its root."""
+        parent = self.parent
+        for i in range(len(parent)):
+            parent[i] = self.find(i)
+
+    def _writable(self):
+        if not isinstance(self.parent, array):
+            parent, size = array("i"), array("i")
+            parent.frombytes(self.parent.cast("B"))
+            size.frombytes(self.size.cast("B"))
+            self.parent, self.size = parent, size
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return i
+        self._writable()
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        return i
+
+    def add(self):
+        """Adds a new singleton set and returns its position."""
+        self._writable()
+        self.parent.append(len(self.parent))
+        self.size.append(1)
+        return len(self.parent) - 1
+
+
+class ComponentIndex():
+    """
+    Union-find over people whose parent array('i') doubles as the stored
+    component labels: a state's label is the root of its set.
+
+    index maps states to positions as returned by graph.state_index.
+    Additions are applied in place
+    with add and union; removals can split components, so callers mark the
+    index stale and rebuild it.
+    """
+
+    def __init__(self, sets, index=None):
+        self.sets = sets
+        self.index = index
+        self.stale = False
+
+    @classmethod
+    def build(cls, states, casts):
+        """
+        Labels states given casts, an iterable of the states starring in
+        each movie.
+        """
+        states, index = state_index(states)
+        components = cls(UnionFind(len(states)), index)
+        for cast in casts:
+            components.union_all(cast)
+        return components
+
+    @classmethod
+    def from_arrays(cls, parent, size):
+        """
+        Returns the index over positions stored by arrays, e.g. mapped
+        from a graph snapshot.
+        """
+        return cls(UnionFind.from_arrays(parent, size))
+
+    def arrays(self):
+        """
+        Returns the compressed parent (label) and size arrays, the form
+        from_arrays reads back.
+        """
+        self.sets.compress()
+        return {"parent": self.sets.parent, "size": self.sets.size}
+
+    def add(self, state):
+        """Adds state as a singleton component."""
+        position = self.sets.add()
+        if self.index is not None:
+            self.index[state] = position
+
+    def union_all(self, states):
+        """Merges the components of all given states."""
+        first = None
+        for state in states:
+            i = position(self.index, state)
+            first = i if first is None else self.sets.union(first, i)
+
+    def component(self, state):
+        """Returns the label of state's component."""
+        return self.sets.find(position(self.index, state))
+
+    def connected(self, a, b):
+        """Returns True if a path links a and b."""
+        return self.component(a) == self.component(b)
+
+    def size(self, state):
+        """Returns the number of people in state's component."""
+        return self.sets.size[self.component(state)]
+
+    def sizes(self):
+        """Returns the size of every component."""
+        sets = self.sets
+        return [sets.size[i] for i in range(len(sets.parent))
+                if sets.parent[i] == i]
+
+    def stats(self, top=5):
+        """
+        Returns the number of components, singletons, the largest
+        component sizes and a histogram of sizes.
+        """
+        sizes = self.sizes()
+        histogram = Counter(sizes)
+        return {
+            "components": len(sizes),
+            "singletons": histogram.get(1, 0),
+            "largest": sorted(sizes, reverse=True)[:top],
+            "histogram": dict(sorted(histogram.items())),
+        }
@@ -0,0 +1,68 @@
+"""
+Lazily built, deduplicated co-star adjacency.
+
+neighbors_for_person visits every star of every movie of a person and
+allocates a fresh set per call. CostarIndex computes each person's
+distinct co-stars once, on first visit, keeping a single via-movie per
+co-star, and afterwards only iterates the stored sequences.
+"""
+
+from array import array
+
+
+class CostarIndex():
+    """
+    Maps each visited person to (co-stars, via movies), two parallel
+    sequences without duplicates or the person itself.
+
+    movies_of(person) and stars_of(movie) describe the underlying graph.
+    With a typecode the sequences are stored as arrays of that type (for
+    integer states), otherwise as tuples.
+    """
+
+    def __init__(self, movies_of, stars_of, typecode=None):
+        self.movies_of = movies_of
+        self.stars_of = stars_of
+        self.typecode = typecode
+        self.entries = {}
+
+    def entry(self, person):
+        """Returns (co-stars, via movies) for person, building it if needed."""
+        try:
+            return self.entries[person]
+        except KeyError:
+            pass
+        via = {}
+        for movie in self.movies_of(person):
+            for star in self.stars_of(movie):
+                if star != person and star not in via:
+                    via[star] = movie
+        if self.typecode is None:
+            entry = (tuple(via), tuple(via.values()))
+        else:
+            entry = (array(self.typecode, via),
+                     array(self.typecode, via.values()))
+        self.entries[person] = entry
+        return entry
+
+    def neighbors(self, person):
+        """
+        Same contract as degrees.neighbors_for_person, minus duplicate
+        co-stars and the person itself; yields (movie, person) pairs.
+        """
+        costars, movies = self.entry(person)
+        return zip(movies, costars)
+
+    def build(self, people):
+        """Eagerly builds the entries of every person in people."""
+        for person in people:
+            self.entry(person)
+
+    def discard(self, person):
+        """Forgets person's entry so it is rebuilt on next use."""
+        self.entries.pop(person, None)
+
+    def nbytes(self):
+        if self.typecode is None:
+            return None
+        return sum(len(c) * c.itemsize * 2 for c, _ in self.entries.values())
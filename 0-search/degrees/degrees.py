@@ -1,7 +1,17 @@
+import argparse
 import csv
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+from array import array
+from collections import deque
+from functools import partial
+
+from components import ComponentIndex
+from costars import CostarIndex
+from graph import CSRGraph, load_cached
+from landmarks import LandmarkIndex, astar_search
+from nameindex import NameIndex
+from trees import UNSET, TreeCache, tree_path
+from util import Node, FastQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +22,122 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact CSR copy of the dataset, used instead of the dicts above
+# when data is loaded with compact=True
+graph = None
+
+# BFS trees of recently queried sources, used by the "tree" search mode
+tree_cache = TreeCache()
+
+# Landmark distance index, built on demand by build_landmarks
+landmark_index = None
+
+# Deduplicated co-star adjacency searches use once enabled by use_costars
+costar_index = None
 
-def load_data(directory):
+# Prefix and fuzzy name lookup, see build_name_index
+name_index = None
+
+# Connected component labels, used to reject unreachable queries
+component_index = None
+
+
+def load_data(directory, compact=False, snapshot=True, workers=1,
+              index_names=False, components=True, landmarks=0):
     """
     Load data from CSV files into memory.
+
+    With compact=True the data is loaded into a CSRGraph instead of the
+    names/people/movies dicts. The graph is then memory-mapped from a
+    binary snapshot next to the CSVs, which is (re)written whenever a
+    CSV's size or mtime changes; pass snapshot=False to always parse.
+    workers > 1 parses stars.csv in a process pool when building it.
+    index_names=True also builds the name index used by search_names.
+    components=True labels connected components so that shortest_path
+    answers unreachable queries without searching; compact snapshots
+    store the labels, so they are only computed when it is rebuilt.
+    landmarks=N builds the landmark index from N landmarks up front;
+    compact snapshots store it the same way.
+    """
+    global graph, landmark_index, costar_index, name_index, component_index
+    global _flat_buffers
+    tree_cache.clear()
+    _flat_buffers = None
+    landmark_index = None
+    costar_index = None
+    name_index = None
+    component_index = None
+    if compact:
+        if snapshot:
+            derived = {}
+            if components:
+                derived["components"] = _stored_components
+            if landmarks:
+                derived["landmarks"] = partial(_stored_landmarks,
+                                               count=landmarks)
+            graph = load_cached(directory, workers, derived)
+            if components:
+                component_index = ComponentIndex.from_arrays(
+                    **graph.extra("components")
+                )
+            if landmarks:
+                landmark_index = LandmarkIndex.from_arrays(
+                    **graph.extra("landmarks")
+                )
+        else:
+            graph = CSRGraph.from_csv(directory, workers)
+    else:
+        graph = None
+        _load_dicts(directory)
+    if index_names:
+        build_name_index()
+    if components and component_index is None:
+        build_components()
+    if landmarks and landmark_index is None:
+        build_landmarks(landmarks)
+
+
+def _stored_components(graph, stored):
+    """
+    Returns the component label arrays to store in graph's snapshot,
+    or None if stored ones exist.
+    """
+    if stored is not None:
+        return None
+    return _csr_components(graph).arrays()
+
+
+def _stored_landmarks(graph, stored, count):
     """
+    Returns the landmark arrays to store in graph's snapshot, or None
+    if stored ones with count landmarks exist.
+    """
+    # A graph with fewer people only ever gets that many landmarks
+    count = min(count, graph.num_people)
+    if stored is not None and len(stored["people"]) == count:
+        return None
+    return _csr_landmarks(graph, count).arrays()
+
+
+def _csr_landmarks(graph, count):
+    return LandmarkIndex.build(
+        range(graph.num_people), graph.neighbors,
+        lambda p: len(graph.movies_of(p)), count
+    )
+
+
+def _csr_components(graph):
+    return ComponentIndex.build(
+        range(graph.num_people),
+        (graph.stars_of(m) for m in range(graph.num_movies))
+    )
+
+
+def _load_dicts(directory):
+    """
+    Load data from CSV files into the names/people/movies dicts.
+    """
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -53,14 +174,31 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(prog="degrees.py")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the dataset into a CSRGraph")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="with --compact, parse the CSVs every time")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="with --compact, processes parsing stars.csv")
+    parser.add_argument("--mode", choices=SEARCHES, default="bfs",
+                        help="search algorithm")
+    parser.add_argument("--costars", action="store_true",
+                        help="search a deduplicated co-star adjacency")
+    parser.add_argument("--landmarks", type=int, default=0, metavar="N",
+                        help="build N landmarks at load (default: on first "
+                             "astar query)")
+    args = parser.parse_args()
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, compact=args.compact,
+              snapshot=not args.no_snapshot, workers=args.workers,
+              landmarks=args.landmarks)
     print("Data loaded.")
+    if args.costars:
+        use_costars()
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +207,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, mode=args.mode)
 
     if path is None:
         print("Not connected.")
@@ -78,18 +216,100 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person(path[i][1])["name"]
+            person2 = person(path[i + 1][1])["name"]
+            movie = movie_info(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, mode="bfs"):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    mode selects the search algorithm, one of the keys of SEARCHES.
+    """
+    search = SEARCHES[mode]
+    if (component_index is not None and source != target
+            and not connected(source, target)):
+        return None
+    if graph is not None:
+        path = search(
+            graph.person_index(source), graph.person_index(target),
+            search_neighbors()
+        )
+        return graph.path_ids(path)
+    return search(source, target, search_neighbors())
+
+
+def build_components():
+    """
+    Labels the connected components of the loaded data.
+    """
+    global component_index
+    if graph is not None:
+        component_index = _csr_components(graph)
+    else:
+        component_index = ComponentIndex.build(
+            people, (movie["stars"] for movie in movies.values())
+        )
+    return component_index
+
+
+def connected(source, target):
+    """
+    Returns True if some path links two person_ids, in O(1) once
+    components are built.
+    """
+    index = component_index
+    if index is None or index.stale:
+        index = build_components()
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+    return index.connected(source, target)
+
+
+def search_neighbors():
+    """
+    Returns the neighbors function searches run on: the co-star index
+    when enabled, else CSR indices or person_ids of the loaded data.
+    """
+    if costar_index is not None:
+        return costar_index.neighbors
+    if graph is not None:
+        return graph.neighbors
+    return neighbors_for_person
+
+
+def use_costars(enabled=True, eager=False):
+    """
+    Switches searches to a deduplicated co-star adjacency, built lazily
+    per visited person (or for everyone at once with eager=True).
+    """
+    global costar_index
+    if not enabled:
+        costar_index = None
+        return None
+    if graph is not None:
+        costar_index = CostarIndex(graph.movies_of, graph.stars_of, "i")
+        people_iter = range(graph.num_people)
+    else:
+        costar_index = CostarIndex(
+            lambda p: people[p]["movies"], lambda m: movies[m]["stars"]
+        )
+        people_iter = people
+    if eager:
+        costar_index.build(people_iter)
+    return costar_index
+
+
+def breadth_first_search(source, target, neighbors):
+    """
+    Runs BFS from source to target, where neighbors(state) returns
+    (action, state) pairs. Returns the list of (action, state) pairs
+    on the path, or None.
     """
 
     # Keep track of number of states explored
@@ -100,7 +320,7 @@ def shortest_path(source, target):
     start = Node(state=source, parent=None, action=None)
 
     # Create frontier with BFS Search Algorithm
-    frontier = QueueFrontier()
+    frontier = FastQueueFrontier()
 
     frontier.add(start)
 
@@ -129,30 +349,272 @@ def shortest_path(source, target):
 
         # Mark node as explored
         explored.add(node.state)
-        neighbors = list(neighbors_for_person(node.state))
-
         # Add neighbors to frontier
-        for movie, person in neighbors:
-            if not frontier.contains_state(person) and person not in explored:
-                child = Node(state=person, parent=node, action=movie)
+        for action, state in neighbors(node.state):
+            if not frontier.contains_state(state) and state not in explored:
+                child = Node(state=state, parent=node, action=action)
                 frontier.add(child)
     
 
 
+class _ParentMap(dict):
+    """Dict that reads UNSET for missing keys without inserting them."""
+
+    def __missing__(self, key):
+        return UNSET
+
+
+# (graph, parents, actions) arrays flat_search reuses across CSR queries
+_flat_buffers = None
+
+
+def _flat_arrays():
+    """
+    Returns the parent and action arrays for the loaded graph, allocated
+    once (and again when people are added); every parent is UNSET
+    between searches.
+    """
+    global _flat_buffers
+    if (_flat_buffers is None or _flat_buffers[0] is not graph
+            or len(_flat_buffers[1]) != graph.num_people):
+        _flat_buffers = (
+            graph,
+            array("i", [UNSET]) * graph.num_people,
+            array("i", [UNSET]) * graph.num_people,
+        )
+    return _flat_buffers[1], _flat_buffers[2]
+
+
+def flat_search(source, target, neighbors):
+    """
+    Same contract as breadth_first_search without a Node per state.
+    Parents and actions live in flat int arrays indexed by CSR person
+    index (dicts for person_ids) and the path is rebuilt once at the end.
+    The arrays are reused across queries and only the entries a search
+    set are reset, so a short search costs what it visits, not the size
+    of the graph.
+    """
+    if source == target:
+        return []
+    reuse = graph is not None and isinstance(source, int)
+    if reuse:
+        parents, actions = _flat_arrays()
+    else:
+        parents = _ParentMap()
+        actions = {}
+    parents[source] = source
+    reached = [source]
+
+    try:
+        queue = deque([source])
+        while queue:
+            state = queue.popleft()
+            for action, neighbor in neighbors(state):
+                if parents[neighbor] != UNSET:
+                    continue
+                parents[neighbor] = state
+                actions[neighbor] = action
+                reached.append(neighbor)
+                if neighbor == target:
+                    solution = []
+                    while neighbor != source:
+                        solution.append((actions[neighbor], neighbor))
+                        neighbor = parents[neighbor]
+                    solution.reverse()
+                    return solution
+                queue.append(neighbor)
+        return None
+    finally:
+        if reuse:
+            for state in reached:
+                parents[state] = UNSET
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Same contract as breadth_first_search, but expands one full BFS level
+    at a time from whichever side has the smaller frontier and stops at
+    the first level where the two searches meet.
+
+    The co-star graph is undirected, so neighbors serves both directions.
+    """
+    if source == target:
+        return []
+
+    # Map each reached state to (state it was reached from, action)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+
+        # Expand the smaller side
+        expand_forward = len(forward_frontier) <= len(backward_frontier)
+        if expand_forward:
+            frontier, parents, other = forward_frontier, forward, backward
+        else:
+            frontier, parents, other = backward_frontier, backward, forward
+
+        next_frontier = []
+        meeting = None
+        for state in frontier:
+            for action, neighbor in neighbors(state):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (state, action)
+                next_frontier.append(neighbor)
+                if neighbor in other:
+                    length = _depth(parents, neighbor) + _depth(other, neighbor)
+                    if meeting is None or length < meeting[0]:
+                        meeting = (length, neighbor)
+
+        if meeting is not None:
+            return _join(forward, backward, meeting[1])
+
+        if expand_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def _depth(parents, state):
+    """Returns the number of edges from state back to its search root."""
+    depth = 0
+    while parents[state] is not None:
+        state = parents[state][0]
+        depth += 1
+    return depth
+
+
+def _join(forward, backward, meeting):
+    """
+    Builds the (action, state) path through the meeting state
+    from the forward and backward parent maps.
+    """
+    solution = []
+    state = meeting
+    while forward[state] is not None:
+        parent, action = forward[state]
+        solution.append((action, state))
+        state = parent
+    solution.reverse()
+
+    state = meeting
+    while backward[state] is not None:
+        child, action = backward[state]
+        solution.append((action, child))
+        state = child
+    return solution
+
+
+def tree_search(source, target, neighbors):
+    """
+    Same contract as breadth_first_search, answered from the cached
+    BFS tree of source so repeated sources cost a single BFS.
+    """
+    return tree_path(_cached_tree(source, neighbors), target)
+
+
+def _cached_tree(source, neighbors):
+    # CSR states are dense person indices, so their trees are arrays
+    size = graph.num_people if graph is not None else None
+    return tree_cache.tree(source, neighbors, size)
+
+
+def shortest_paths(source, targets):
+    """
+    Returns a dict mapping each target person_id to its shortest path
+    from source (as returned by shortest_path), using one BFS tree.
+    """
+    if graph is not None:
+        tree = _cached_tree(graph.person_index(source), search_neighbors())
+        return {
+            target: graph.path_ids(tree_path(tree, graph.person_index(target)))
+            for target in targets
+        }
+    tree = _cached_tree(source, search_neighbors())
+    return {target: tree_path(tree, target) for target in targets}
+
+
+def build_landmarks(count=16):
+    """
+    Builds the landmark index over the loaded data from the count
+    people with the most movies.
+    """
+    global landmark_index
+    if graph is not None:
+        landmark_index = _csr_landmarks(graph, count)
+    else:
+        landmark_index = LandmarkIndex.build(
+            people, search_neighbors(),
+            lambda p: len(people[p]["movies"]), count
+        )
+    return landmark_index
+
+
+def landmark_search(source, target, neighbors):
+    """
+    Same contract as breadth_first_search, using A* with landmark lower
+    bounds. Builds the landmark index on first use, and again once added
+    credits have made its bounds inadmissible.
+    """
+    index = landmark_index
+    if index is None or not index.admissible:
+        index = _rebuild_landmarks()
+    return astar_search(source, target, neighbors, index.lower_bound)
+
+
+def _rebuild_landmarks():
+    # Keep the landmark count of the index being replaced
+    if landmark_index is None:
+        return build_landmarks()
+    return build_landmarks(len(landmark_index.landmarks))
+
+
+def distance_estimate(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two person_ids from the landmark index alone, without searching.
+    Bounds are math.inf when the people are provably not connected.
+    """
+    index = landmark_index
+    if index is None or index.stale:
+        index = _rebuild_landmarks()
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+    return index.estimate(source, target)
+
+
+# Search algorithms selectable through shortest_path's mode argument
+SEARCHES = {
+    "bfs": breadth_first_search,
+    "flat": flat_search,
+    "bidirectional": bidirectional_search,
+    "tree": tree_search,
+    "astar": landmark_search,
+}
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = list(graph.person_ids_for_name(name))
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            info = person(person_id)
+            name = info["name"]
+            birth = info["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -165,11 +627,39 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def build_name_index():
+    """
+    Builds the prefix/fuzzy name index over the loaded people.
+    """
+    global name_index
+    if graph is not None:
+        entries = (
+            (graph.person_id(p), graph.names[p])
+            for p in range(graph.num_people) if not graph.removed_person(p)
+        )
+    else:
+        entries = ((pid, person["name"]) for pid, person in people.items())
+    name_index = NameIndex(entries)
+    return name_index
+
+
+def search_names(query, limit=10, max_distance=2):
+    """
+    Returns up to limit person_ids matching query: exact name matches
+    first, then names starting with query, then names within
+    max_distance typos, each group ranked best first.
+    """
+    index = name_index or build_name_index()
+    return [pid for pid, _ in index.search(query, limit, max_distance)]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -178,5 +668,23 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person(person_id):
+    """
+    Returns the name, birth and movies of a person.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_info(movie_id):
+    """
+    Returns the title, year and stars of a movie.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,671 @@
+"""
+Compact, integer-indexed representation of the degrees dataset.
+
+People and movies are remapped to dense indices (sorted by their numeric
+IMDB id) and the star credits are stored twice as CSR (compressed sparse
+row) adjacency arrays: person -> movies and movie -> stars. Strings live in
+a single UTF-8 blob per column instead of one Python object per value.
+"""
+
+import csv
+import json
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+# Snapshot file written next to the CSVs by load_cached
+SNAPSHOT = ".degrees.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP1"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Array attributes of CSRGraph and the string tables, in snapshot order
+ARRAYS = (
+    "person_ids", "movie_ids", "person_offsets", "person_movies",
+    "movie_offsets", "movie_stars", "name_order",
+)
+TABLES = ("names", "births", "titles", "years")
+
+
+class StringTable():
+    """
+    Sequence of strings stored as one UTF-8 blob plus offsets. Strings
+    appended after construction are kept in a plain list and are not
+    part of the blob.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+        self.appended = []
+
+    @classmethod
+    def from_strings(cls, strings):
+        blob = bytearray()
+        offsets = array("q", [0])
+        for s in strings:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(bytes(blob), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1 + len(self.appended)
+
+    def __getitem__(self, i):
+        stored = len(self.offsets) - 1
+        if i >= stored:
+            return self.appended[i - stored]
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def append(self, s):
+        self.appended.append(s)
+
+
+class IdEdits():
+    """
+    Ids added to and removed from a sorted id array after loading.
+    Added ids get the indices following the array's, in order; removed
+    indices are not reused.
+    """
+
+    def __init__(self, ids):
+        self.ids = ids
+        # Id -> index of the ids added since loading
+        self.added = {}
+        self.added_ids = array("q")
+        self.removed = set()
+
+    def __len__(self):
+        return len(self.ids) + len(self.added_ids)
+
+    def index(self, key):
+        """Returns the index of id key, raising KeyError if absent."""
+        try:
+            key = int(key)
+        except (TypeError, ValueError):
+            raise KeyError(key)
+        i = self.added.get(key)
+        if i is None:
+            i = bisect_left(self.ids, key)
+            if i == len(self.ids) or self.ids[i] != key:
+                raise KeyError(key)
+        if i in self.removed:
+            raise KeyError(key)
+        return i
+
+    def id(self, i):
+        stored = len(self.ids)
+        return self.ids[i] if i < stored else self.added_ids[i - stored]
+
+    def add(self, key):
+        """Gives id key the next free index and returns it."""
+        key = int(key)
+        i = len(self)
+        self.added[key] = i
+        self.added_ids.append(key)
+        return i
+
+
+def _csr(num_rows, pairs):
+    """
+    Builds (offsets, targets) arrays from (row, target) pairs
+    that are already sorted by row.
+    """
+    offsets = array("i", bytes(4 * (num_rows + 1)))
+    targets = array("i")
+    for row, target in pairs:
+        offsets[row + 1] += 1
+        targets.append(target)
+    for row in range(num_rows):
+        offsets[row + 1] += offsets[row]
+    return offsets, targets
+
+
+def _transpose(num_rows, num_cols, offsets, targets):
+    """
+    Returns the CSR arrays of the transposed adjacency.
+    Rows of the result list their targets in ascending order.
+    """
+    counts = array("i", bytes(4 * (num_cols + 1)))
+    for col in targets:
+        counts[col + 1] += 1
+    for col in range(num_cols):
+        counts[col + 1] += counts[col]
+    new_targets = array("i", bytes(4 * len(targets)))
+    cursor = array("i", counts)
+    for row in range(num_rows):
+        for k in range(offsets[row], offsets[row + 1]):
+            col = targets[k]
+            new_targets[cursor[col]] = row
+            cursor[col] += 1
+    return counts, new_targets
+
+
+def _parse_stars(path, start, end):
+    """
+    Parses the stars.csv rows that begin in the byte range [start, end)
+    into (person ids, movie ids) arrays. The header and rows with
+    non-integer ids are skipped.
+    """
+    person_ids = array("q")
+    movie_ids = array("q")
+    with open(path, "rb") as f:
+        if start > 0:
+            # Skip to the first row beginning at or after start; a row
+            # straddling start belongs to the previous chunk
+            f.seek(start - 1)
+            f.readline()
+            start = f.tell()
+        data = f.read(max(end - start, 0))
+        if data and not data.endswith(b"\n"):
+            # Finish the row straddling end
+            data += f.readline()
+    for line in data.split(b"\n"):
+        fields = line.split(b",")
+        if len(fields) != 2:
+            continue
+        try:
+            person_id = int(fields[0].strip().strip(b'"'))
+            movie_id = int(fields[1].strip().strip(b'"'))
+        except ValueError:
+            continue
+        person_ids.append(person_id)
+        movie_ids.append(movie_id)
+    return person_ids, movie_ids
+
+
+def read_stars(directory, workers=1):
+    """
+    Returns a list of (person ids, movie ids) array pairs covering every
+    row of stars.csv, parsed from byte-range chunks by a process pool when
+    workers > 1. Relies on ids never being quoted across line breaks.
+    """
+    path = os.path.join(directory, "stars.csv")
+    size = os.path.getsize(path)
+    if workers <= 1:
+        return [_parse_stars(path, 0, size)]
+    bounds = [size * k // workers for k in range(workers + 1)]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(
+            _parse_stars, [path] * workers, bounds[:-1], bounds[1:]
+        ))
+
+
+class CSRGraph():
+    """
+    Co-star graph with integer person/movie indices and CSR adjacency.
+
+    Public lookups accept and return the same string ids as the dicts in
+    degrees.py; the `*_index`, `movies_of`, `stars_of` and `neighbors`
+    methods work on dense integer indices.
+
+    The arrays themselves are never written (they may be mapped from a
+    snapshot). add_person, add_star and the other edits are kept in an
+    overlay instead: people and movies they touch get their adjacency
+    row replaced by an array, and added ids take the indices after the
+    stored ones. Edits are not saved to the snapshot.
+    """
+
+    def __init__(self, person_ids, names, births, movie_ids, titles, years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 name_order):
+        self.person_ids = person_ids
+        self.names = names
+        self.births = births
+        self.movie_ids = movie_ids
+        self.titles = titles
+        self.years = years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.name_order = name_order
+        # Arrays derived from the graph (component labels, landmark
+        # distances) saved in and mapped from the snapshot with it,
+        # keyed "group.name"
+        self.extras = {}
+        # Overlay of edits since loading: ids added and removed, and the
+        # current adjacency row of every person and movie edited
+        self.person_edits = IdEdits(person_ids)
+        self.movie_edits = IdEdits(movie_ids)
+        self.person_rows = {}
+        self.movie_rows = {}
+
+    @classmethod
+    def from_csv(cls, directory, workers=1):
+        """
+        Load people.csv, movies.csv and stars.csv from directory.
+
+        With workers > 1, stars.csv is parsed in that many processes.
+        """
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            people = sorted(
+                (int(row["id"]), row["name"], row["birth"])
+                for row in csv.DictReader(f)
+            )
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            movies = sorted(
+                (int(row["id"]), row["title"], row["year"])
+                for row in csv.DictReader(f)
+            )
+
+        person_ids = array("q", (p[0] for p in people))
+        movie_ids = array("q", (m[0] for m in movies))
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+
+        # Encode each credit as one integer so duplicates collapse and a
+        # plain sort orders them by person, then movie
+        num_movies = len(movie_ids)
+        credits = set()
+        for star_ids, star_movies in read_stars(directory, workers):
+            for person_id, movie_id in zip(star_ids, star_movies):
+                try:
+                    p = person_index[person_id]
+                    m = movie_index[movie_id]
+                except KeyError:
+                    continue
+                credits.add(p * num_movies + m)
+        del person_index, movie_index
+
+        person_offsets, person_movies = _csr(
+            len(person_ids),
+            (divmod(code, num_movies) for code in sorted(credits))
+        )
+        del credits
+        movie_offsets, movie_stars = _transpose(
+            len(person_ids), num_movies, person_offsets, person_movies
+        )
+
+        names = StringTable.from_strings(p[1] for p in people)
+        name_order = array("i", sorted(
+            range(len(people)), key=lambda i: (people[i][1].lower(), i)
+        ))
+
+        return cls(
+            person_ids=person_ids,
+            names=names,
+            births=StringTable.from_strings(p[2] for p in people),
+            movie_ids=movie_ids,
+            titles=StringTable.from_strings(m[1] for m in movies),
+            years=StringTable.from_strings(m[2] for m in movies),
+            person_offsets=person_offsets,
+            person_movies=person_movies,
+            movie_offsets=movie_offsets,
+            movie_stars=movie_stars,
+            name_order=name_order,
+        )
+
+    @property
+    def num_people(self):
+        """Number of person indices, including added and removed people."""
+        return len(self.person_edits)
+
+    @property
+    def num_movies(self):
+        """Number of movie indices, including added and removed movies."""
+        return len(self.movie_edits)
+
+    def person_index(self, person_id):
+        """Returns the dense index for a person id, raising KeyError."""
+        return self.person_edits.index(person_id)
+
+    def movie_index(self, movie_id):
+        """Returns the dense index for a movie id, raising KeyError."""
+        return self.movie_edits.index(movie_id)
+
+    def person_id(self, p):
+        return str(self.person_edits.id(p))
+
+    def movie_id(self, m):
+        return str(self.movie_edits.id(m))
+
+    def movies_of(self, p):
+        """Returns the movie indices person p starred in."""
+        row = self.person_rows.get(p)
+        if row is not None:
+            return row
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_of(self, m):
+        """Returns the person indices who starred in movie m."""
+        row = self.movie_rows.get(m)
+        if row is not None:
+            return row
+        return self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def removed_person(self, p):
+        """Returns True if person p was removed since loading."""
+        return p in self.person_edits.removed
+
+    def add_person(self, person_id, name, birth=""):
+        """
+        Adds a person without movies and returns their index. Raises
+        ValueError if the id exists or is not an integer.
+        """
+        if self._exists(self.person_edits, person_id):
+            raise ValueError(f"person {person_id} already exists")
+        p = self.person_edits.add(person_id)
+        self.names.append(name)
+        self.births.append(birth)
+        self.person_rows[p] = array("i")
+        return p
+
+    def add_movie(self, movie_id, title, year=""):
+        """
+        Adds a movie without stars and returns its index. Raises
+        ValueError if the id exists or is not an integer.
+        """
+        if self._exists(self.movie_edits, movie_id):
+            raise ValueError(f"movie {movie_id} already exists")
+        m = self.movie_edits.add(movie_id)
+        self.titles.append(title)
+        self.years.append(year)
+        self.movie_rows[m] = array("i")
+        return m
+
+    @staticmethod
+    def _exists(edits, key):
+        try:
+            edits.index(key)
+        except KeyError:
+            return False
+        return True
+
+    def remove_person(self, p):
+        """Removes person p and all of their credits."""
+        for m in list(self.movies_of(p)):
+            self.remove_star(p, m)
+        self.person_edits.removed.add(p)
+
+    def remove_movie(self, m):
+        """Removes movie m and all of its credits."""
+        for p in list(self.stars_of(m)):
+            self.remove_star(p, m)
+        self.movie_edits.removed.add(m)
+
+    def add_star(self, p, m):
+        """
+        Credits person p in movie m. Returns False if they already
+        were credited.
+        """
+        movies = array("i", self.movies_of(p))
+        i = bisect_left(movies, m)
+        if i < len(movies) and movies[i] == m:
+            return False
+        movies.insert(i, m)
+        stars = array("i", self.stars_of(m))
+        stars.insert(bisect_left(stars, p), p)
+        self.person_rows[p] = movies
+        self.movie_rows[m] = stars
+        return True
+
+    def remove_star(self, p, m):
+        """
+        Removes the credit of person p in movie m. Returns False if
+        there was none.
+        """
+        movies = array("i", self.movies_of(p))
+        i = bisect_left(movies, m)
+        if i == len(movies) or movies[i] != m:
+            return False
+        del movies[i]
+        stars = array("i", self.stars_of(m))
+        del stars[bisect_left(stars, p)]
+        self.person_rows[p] = movies
+        self.movie_rows[m] = stars
+        return True
+
+    def neighbors(self, p):
+        """
+        Returns (movie, person) index pairs for people
+        who starred with person p, including p itself.
+        """
+        neighbors = set()
+        for m in self.movies_of(p):
+            for q in self.stars_of(m):
+                neighbors.add((m, q))
+        return neighbors
+
+    def neighbors_for_person(self, person_id):
+        """
+        Same contract as degrees.neighbors_for_person.
+        """
+        return {
+            (self.movie_id(m), self.person_id(q))
+            for m, q in self.neighbors(self.person_index(person_id))
+        }
+
+    def person(self, person_id):
+        """
+        Returns a dict shaped like the entries of degrees.people.
+        """
+        p = self.person_index(person_id)
+        return {
+            "name": self.names[p],
+            "birth": self.births[p],
+            "movies": {self.movie_id(m) for m in self.movies_of(p)},
+        }
+
+    def movie(self, movie_id):
+        """
+        Returns a dict shaped like the entries of degrees.movies.
+        """
+        m = self.movie_index(movie_id)
+        return {
+            "title": self.titles[m],
+            "year": self.years[m],
+            "stars": {self.person_id(p) for p in self.stars_of(m)},
+        }
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the set of person ids whose lowercased name equals name.
+        """
+        name = name.lower()
+        key = lambda p: self.names[p].lower()
+        start = bisect_left(self.name_order, name, key=key)
+        found = set()
+        for k in range(start, len(self.name_order)):
+            p = self.name_order[k]
+            if key(p) != name:
+                break
+            if not self.removed_person(p):
+                found.add(self.person_id(p))
+        # People added since loading are not in name_order
+        for p in self.person_edits.added.values():
+            if key(p) == name and not self.removed_person(p):
+                found.add(self.person_id(p))
+        return found
+
+    def path_ids(self, path):
+        """
+        Converts a list of (movie, person) index pairs to string ids.
+        """
+        if path is None:
+            return None
+        return [(self.movie_id(m), self.person_id(p)) for m, p in path]
+
+    def nbytes(self):
+        """
+        Returns the number of bytes held in the graph's buffers.
+        """
+        return sum(memoryview(b).nbytes for b in self._buffers().values())
+
+    def _buffers(self):
+        """
+        Returns every buffer of the graph keyed by its snapshot section.
+        """
+        buffers = {name: getattr(self, name) for name in ARRAYS}
+        for name in TABLES:
+            table = getattr(self, name)
+            buffers[f"{name}.blob"] = table.blob
+            buffers[f"{name}.offsets"] = table.offsets
+        for name, buffer in self.extras.items():
+            buffers[f"extra.{name}"] = buffer
+        return buffers
+
+    def extra(self, group):
+        """
+        Returns the derived arrays stored under group, keyed by name,
+        or None if there are none.
+        """
+        prefix = f"{group}."
+        arrays = {
+            name[len(prefix):]: buffer for name, buffer in self.extras.items()
+            if name.startswith(prefix)
+        }
+        return arrays or None
+
+    def save(self, path, sources=None):
+        """
+        Writes the graph to a binary snapshot at path.
+
+        sources is stored in the header as-is so that readers can tell
+        whether the snapshot is stale.
+        """
+        sections = []
+        offset = 0
+        for name, buffer in self._buffers().items():
+            # Mapped sections are memoryviews, which have no typecode
+            typecode = memoryview(buffer).format
+            size = memoryview(buffer).nbytes
+            sections.append([name, typecode, offset, size])
+            offset += size + (-size % 8)
+        header = json.dumps({
+            "byteorder": sys.byteorder,
+            "sources": sources,
+            "sections": sections,
+        }).encode("utf-8")
+        header += b" " * (-(len(SNAPSHOT_MAGIC) + 8 + len(header)) % 8)
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for buffer in self._buffers().values():
+                view = memoryview(buffer).cast("B")
+                f.write(view)
+                f.write(bytes(-len(view) % 8))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, sources=None):
+        """
+        Memory-maps a snapshot written by save.
+
+        Returns None if the file is missing, malformed, written on a
+        machine with a different byte order, or its stored sources
+        differ from the given ones.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        view = memoryview(data)
+        start = len(SNAPSHOT_MAGIC) + 8
+        try:
+            if view[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                return None
+            length = int.from_bytes(view[len(SNAPSHOT_MAGIC):start], "little")
+            if start + length > len(view):
+                return None
+            header = json.loads(bytes(view[start:start + length]))
+            if header["byteorder"] != sys.byteorder:
+                return None
+            if sources is not None and header["sources"] != sources:
+                return None
+
+            base = start + length
+            buffers = {}
+            for name, typecode, offset, size in header["sections"]:
+                # A truncated file would silently yield short sections
+                if offset < 0 or size < 0 or base + offset + size > len(view):
+                    return None
+                section = view[base + offset:base + offset + size]
+                buffers[name] = (section if typecode == "B"
+                                 else section.cast(typecode))
+            fields = {name: buffers[name] for name in ARRAYS}
+            for name in TABLES:
+                fields[name] = StringTable(
+                    buffers[f"{name}.blob"], buffers[f"{name}.offsets"]
+                )
+        except (KeyError, TypeError, ValueError):
+            return None
+        graph = cls(**fields)
+        graph.extras = {
+            name[len("extra."):]: buffer for name, buffer in buffers.items()
+            if name.startswith("extra.")
+        }
+        graph.snapshot = data
+        return graph
+
+
+def source_stats(directory):
+    """
+    Returns the size and mtime of each source CSV, for snapshot validation.
+    """
+    stats = {}
+    for name in SOURCES:
+        st = os.stat(os.path.join(directory, name))
+        stats[name] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def load_cached(directory, workers=1, derived=None):
+    """
+    Returns the CSRGraph for directory, memory-mapping its snapshot when
+    the snapshot is up to date and rebuilding it from the CSVs otherwise.
+
+    derived maps extra groups to build(graph, stored) functions, called
+    with the group's stored arrays (or None); build returns a dict of
+    new arrays for the group, or None to keep the stored ones. The
+    snapshot is rewritten whenever anything had to be built.
+    """
+    path = os.path.join(directory, SNAPSHOT)
+    sources = source_stats(directory)
+    graph = CSRGraph.load(path, sources)
+    rebuilt = graph is None
+    if rebuilt:
+        graph = CSRGraph.from_csv(directory, workers)
+    for group, build in (derived or {}).items():
+        arrays = build(graph, graph.extra(group))
+        if arrays is not None:
+            graph.extras = {
+                name: buffer for name, buffer in graph.extras.items()
+                if not name.startswith(f"{group}.")
+            }
+            for name, buffer in arrays.items():
+                graph.extras[f"{group}.{name}"] = buffer
+            rebuilt = True
+    if not rebuilt:
+        return graph
+    try:
+        graph.save(path, sources)
+    except OSError:
+        # A read-only dataset still loads, just without the cache
+        pass
+    return graph
+
+
+def state_index(states):
+    """
+    Returns states as a sequence, and None if they are the positions
+    0..n-1 of a CSR graph or else a dict mapping each state to its
+    position. Indexes kept over people (component labels, landmark
+    distances) store one entry per position, which is what lets the
+    CSR ones live in the snapshot's extra sections.
+    """
+    if isinstance(states, range):
+        return states, None
+    states = list(states)
+    return states, {state: i for i, state in enumerate(states)}
+
+
+def position(index, state):
+    """Returns the position of state given the index from state_index."""
+    return state if index is None else index[state]
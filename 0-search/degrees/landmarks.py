@@ -0,0 +1,169 @@
+"""
+Landmark (ALT) distance index for the co-star graph.
+
+BFS distances from a few high-degree landmark people give, through the
+triangle inequality, admissible lower bounds for A* and instant
+"about how far apart" estimates without any search.
+"""
+
+import heapq
+import itertools
+import math
+from array import array
+from collections import deque
+
+from graph import position, state_index
+
+# Distance stored for states a landmark cannot reach
+UNREACHABLE = -1
+
+
+class LandmarkIndex():
+    """
+    BFS distances from each landmark to every state, one array per landmark.
+
+    index maps states to positions as returned by graph.state_index.
+    """
+
+    def __init__(self, landmarks, distances, index=None):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.index = index
+        # Credits edited since the build leave the distances inexact
+        # (stale). Removals only lengthen paths, so the lower bounds
+        # stay admissible; additions may shorten them, so they do not.
+        self.stale = False
+        self.admissible = True
+
+    @classmethod
+    def build(cls, states, neighbors, degree, count=16):
+        """
+        Picks the count states with the highest degree(state) as landmarks
+        and runs one BFS from each of them.
+        """
+        states, index = state_index(states)
+        landmarks = heapq.nlargest(count, states, key=degree)
+        distances = []
+        for landmark in landmarks:
+            dist = array("h", [UNREACHABLE]) * len(states)
+            dist[position(index, landmark)] = 0
+            queue = deque([landmark])
+            while queue:
+                state = queue.popleft()
+                d = dist[position(index, state)] + 1
+                for _, neighbor in neighbors(state):
+                    i = position(index, neighbor)
+                    if dist[i] == UNREACHABLE:
+                        dist[i] = d
+                        queue.append(neighbor)
+            distances.append(dist)
+        return cls(landmarks, distances, index)
+
+    @classmethod
+    def from_arrays(cls, people, distances):
+        """
+        Returns the index over positions 0..n-1 stored by arrays, e.g.
+        mapped from a graph snapshot.
+        """
+        n = len(distances) // len(people) if len(people) else 0
+        return cls(
+            list(people),
+            [distances[i * n:(i + 1) * n] for i in range(len(people))]
+        )
+
+    def arrays(self):
+        """
+        Returns the landmarks and their concatenated distances, the
+        form from_arrays reads back; positional indexes only.
+        """
+        distances = array("h")
+        for dist in self.distances:
+            distances.extend(dist)
+        return {"people": array("i", self.landmarks), "distances": distances}
+
+    def _column(self, state):
+        """
+        Returns the distances of state from every landmark. People
+        added since the build have no credits as far as the index
+        knows, so no landmark reaches them.
+        """
+        i = state if self.index is None else self.index.get(state)
+        if i is None or not self.distances or i >= len(self.distances[0]):
+            return [UNREACHABLE] * len(self.distances)
+        return [dist[i] for dist in self.distances]
+
+    def _pairs(self, a, b):
+        return zip(self._column(a), self._column(b))
+
+    def lower_bound(self, a, b):
+        """
+        Returns an admissible lower bound on the distance from a to b,
+        or math.inf if some landmark proves they are not connected.
+        """
+        bound = 0
+        for da, db in self._pairs(a, b):
+            if (da == UNREACHABLE) != (db == UNREACHABLE):
+                return math.inf
+            if da != UNREACHABLE:
+                bound = max(bound, abs(da - db))
+        return bound
+
+    def upper_bound(self, a, b):
+        """
+        Returns the length of the shortest a -> landmark -> b route,
+        or math.inf if no landmark reaches both.
+        """
+        bound = math.inf
+        for da, db in self._pairs(a, b):
+            if da != UNREACHABLE and db != UNREACHABLE:
+                bound = min(bound, da + db)
+        return bound
+
+    def estimate(self, a, b):
+        """Returns (lower, upper) bounds on the distance from a to b."""
+        return self.lower_bound(a, b), self.upper_bound(a, b)
+
+    def nbytes(self):
+        return sum(len(d) * d.itemsize for d in self.distances)
+
+
+def astar_search(source, target, neighbors, heuristic):
+    """
+    Same contract as degrees.breadth_first_search, ordering the frontier
+    by path length plus heuristic(state, target). The heuristic must be
+    consistent for the first path found to be the shortest.
+    """
+    h = heuristic(source, target)
+    if h == math.inf:
+        return None
+
+    parents = {source: None}
+    cost = {source: 0}
+    closed = set()
+    tie = itertools.count()
+    frontier = [(h, next(tie), source)]
+    while frontier:
+        _, _, state = heapq.heappop(frontier)
+        if state in closed:
+            continue
+        if state == target:
+            solution = []
+            while parents[state] is not None:
+                parent, action = parents[state]
+                solution.append((action, state))
+                state = parent
+            solution.reverse()
+            return solution
+        closed.add(state)
+
+        g = cost[state] + 1
+        for action, neighbor in neighbors(state):
+            if neighbor in closed or g >= cost.get(neighbor, math.inf):
+                continue
+            h = heuristic(neighbor, target)
+            if h == math.inf:
+                continue
+            cost[neighbor] = g
+            parents[neighbor] = (state, action)
+            heapq.heappush(frontier, (g + h, next(tie), neighbor))
+    return None
@@ -0,0 +1,225 @@
+"""
+Prefix and typo-tolerant lookup of people by name.
+
+Distinct lowercased names are also kept in a sorted list so prefixes are
+a bisect away; a trigram inverted index supplies fuzzy candidates, which
+are ranked by edit distance.
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+# Search tiers, best first
+EXACT, PREFIX, FUZZY = range(3)
+
+
+def trigrams(key):
+    """Returns the set of padded character trigrams of key."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between a and b, or limit + 1
+    as soon as it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NameIndex():
+    """
+    Index over (person_id, name) pairs answering exact, prefix and fuzzy
+    queries with ranked person_ids.
+    """
+
+    def __init__(self, entries, max_postings=50000, max_candidates=500):
+        by_key = {}
+        for person_id, name in entries:
+            by_key.setdefault(name.lower(), []).append(person_id)
+
+        # keys and ids are indexed by a key's stable position; sorted_keys
+        # and sorted_positions keep the same keys in order for bisect.
+        # Positions of the initial keys ascend by key length, so the keys
+        # of one length range are one position range in every posting
+        # list; keys added later follow them in any order.
+        self.keys = sorted(by_key, key=lambda key: (len(key), key))
+        self.ids = [by_key[key] for key in self.keys]
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.sorted_keys = sorted(self.keys)
+        self.sorted_positions = [self.positions[key] for key in self.sorted_keys]
+        # length_starts[n] is the first position of an initial key with
+        # at least n characters; built is the number of initial keys
+        lengths = [len(key) for key in self.keys]
+        self.length_starts = array("i", (
+            bisect_left(lengths, n)
+            for n in range((lengths[-1] + 2) if lengths else 1)
+        ))
+        self.built = len(self.keys)
+        self.max_postings = max_postings
+        self.max_candidates = max_candidates
+
+        postings = {}
+        for position, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                postings.setdefault(gram, array("i")).append(position)
+        self.postings = postings
+
+    def add(self, person_id, name):
+        """Indexes person_id under name."""
+        key = name.lower()
+        if key in self.positions:
+            self.ids[self.positions[key]].append(person_id)
+            return
+        position = len(self.keys)
+        self.keys.append(key)
+        self.ids.append([person_id])
+        self.positions[key] = position
+        i = bisect_left(self.sorted_keys, key)
+        self.sorted_keys.insert(i, key)
+        self.sorted_positions.insert(i, position)
+        for gram in trigrams(key):
+            self.postings.setdefault(gram, array("i")).append(position)
+
+    def remove(self, person_id, name):
+        """
+        Drops person_id from name; the emptied key stays indexed but
+        no longer yields results.
+        """
+        position = self.positions.get(name.lower())
+        if position is not None and person_id in self.ids[position]:
+            self.ids[position].remove(person_id)
+
+    def exact(self, name):
+        """Returns the person_ids whose name equals name, ignoring case."""
+        position = self.positions.get(name.lower())
+        return [] if position is None else list(self.ids[position])
+
+    def _prefix_positions(self, prefix, limit):
+        i = bisect_left(self.sorted_keys, prefix)
+        positions = []
+        while (i < len(self.sorted_keys) and len(positions) < limit
+               and self.sorted_keys[i].startswith(prefix)):
+            position = self.sorted_positions[i]
+            if self.ids[position]:
+                positions.append(position)
+            i += 1
+        return positions
+
+    def prefix(self, prefix, limit=10):
+        """Returns person_ids of up to limit names starting with prefix."""
+        return self._collect(
+            self._prefix_positions(prefix.lower(), limit), limit
+        )
+
+    def _length_start(self, length):
+        """
+        Returns the first position of an initial key with at least
+        length characters.
+        """
+        starts = self.length_starts
+        return starts[min(max(length, 0), len(starts) - 1)]
+
+    def _window(self, positions, start, stop):
+        """
+        Returns the entries of a posting list within [start, stop) plus
+        those of keys added after the index was built.
+        """
+        return (positions[bisect_left(positions, start):
+                          bisect_left(positions, stop)]
+                + positions[bisect_left(positions, self.built):])
+
+    def _fuzzy_positions(self, key, max_distance, limit):
+        grams = trigrams(key)
+        # Keys more than max_distance characters longer or shorter are
+        # too far, so only their position range is counted
+        start = self._length_start(len(key) - max_distance)
+        stop = self._length_start(len(key) + max_distance + 1)
+        lists = sorted(
+            (self._window(self.postings[g], start, stop)
+             for g in grams if g in self.postings), key=len
+        )
+        # Very common trigrams add little but cost a lot; keep at least one
+        lists = [p for p in lists if len(p) <= self.max_postings] or lists[:1]
+        shared = Counter()
+        for positions in lists:
+            shared.update(positions)
+
+        # Each edit destroys at most three trigrams of the query
+        threshold = max(1, len(grams) - 3 * max_distance)
+        # Only the max_candidates names sharing the most trigrams are
+        # compared, instead of sorting every counted position
+        candidates = heapq.nlargest(
+            self.max_candidates,
+            ((count, -position) for position, count in shared.items()
+             if count >= threshold)
+        )
+        ranked = []
+        for count, position in candidates:
+            position = -position
+            name = self.keys[position]
+            # Keys added after the build are not windowed by length
+            if not self.ids[position] or \
+                    abs(len(name) - len(key)) > max_distance:
+                continue
+            distance = edit_distance(key, name, max_distance)
+            if distance <= max_distance:
+                ranked.append((distance, -count, name, position))
+        ranked.sort()
+        return [position for *_, position in ranked[:limit]]
+
+    def fuzzy(self, name, limit=10, max_distance=2):
+        """
+        Returns person_ids of up to limit names within max_distance edits
+        of name, closest first.
+        """
+        return self._collect(
+            self._fuzzy_positions(name.lower(), max_distance, limit), limit
+        )
+
+    def search(self, query, limit=10, max_distance=2):
+        """
+        Returns up to limit (person_id, tier) pairs: exact matches first,
+        then names starting with query, then fuzzy matches. A tier is
+        only searched if the ones before it left room.
+        """
+        key = query.lower()
+        results = []
+        seen = set()
+        tiers = (
+            (EXACT, lambda: [self.positions[key]] if key in self.positions
+             else []),
+            (PREFIX, lambda: self._prefix_positions(key, limit + 1)),
+            (FUZZY, lambda: self._fuzzy_positions(key, max_distance, limit)),
+        )
+        for tier, positions in tiers:
+            if len(results) >= limit:
+                break
+            for position in positions():
+                if position in seen:
+                    continue
+                seen.add(position)
+                results.extend((pid, tier) for pid in self.ids[position])
+        return results[:limit]
+
+    def _collect(self, positions, limit):
+        ids = []
+        for position in positions:
+            ids.extend(self.ids[position])
+        return ids[:limit]
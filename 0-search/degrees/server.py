@@ -0,0 +1,305 @@
+"""
+Resident query server for degrees.
+
+Loads the dataset once and answers HTTP GET requests with JSON:
+
+    /path?source=<person_id>&target=<person_id>[&mode=bfs]
+    /names?q=<query>[&limit=10]
+    /delta?path=<delta csv>
+    /metrics
+
+Searches run in a process pool whose workers load the same dataset, so
+concurrent clients do not wait on each other's searches. /delta applies
+a delta CSV (see updates.py) to the server's data, and every worker
+applies it before its next search, so the data never needs reloading.
+
+Usage: python server.py [directory] [--port 8050] [--workers N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+import updates
+
+# Latency samples kept per endpoint for the percentiles in /metrics
+SAMPLES = 1024
+
+
+class Metrics():
+    """
+    Request counts, errors and recent latencies per endpoint.
+    """
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self.counts = {}
+        self.errors = {}
+        self.latencies = {}
+
+    def record(self, endpoint, seconds, error=False):
+        self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+        if error:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        self.latencies.setdefault(
+            endpoint, deque(maxlen=self.samples)
+        ).append(seconds)
+
+    def report(self):
+        report = {}
+        for endpoint, count in self.counts.items():
+            latencies = sorted(self.latencies[endpoint])
+            report[endpoint] = {
+                "requests": count,
+                "errors": self.errors.get(endpoint, 0),
+                "latency_ms": {
+                    f"p{q}": round(1000 * percentile(latencies, q), 3)
+                    for q in (50, 90, 99)
+                },
+            }
+        return report
+
+
+def percentile(ordered, q):
+    """Returns the q-th percentile of an ascending list (nearest rank)."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-q * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+# Number of the server's deltas this pool worker has applied
+_applied = 0
+
+
+def _init_worker(options):
+    """Loads the dataset into a pool worker."""
+    degrees.load_data(**options)
+
+
+def _catch_up(deltas):
+    """
+    Applies, in order, the deltas this worker has not applied yet. A
+    delta that failed in the server fails at the same row here, which
+    leaves the same rows applied.
+    """
+    global _applied
+    for path in deltas[_applied:]:
+        try:
+            updates.apply_delta(path)
+        except (updates.UpdateError, KeyError, ValueError):
+            pass
+        _applied += 1
+
+
+def _find_path(source, target, mode, deltas=()):
+    """
+    Runs in a pool worker, after applying any new deltas; returns the
+    path as a list of dicts.
+    """
+    _catch_up(deltas)
+    path = degrees.shortest_path(source, target, mode=mode)
+    if path is None:
+        return None
+    steps = []
+    for movie_id, person_id in path:
+        steps.append({
+            "movie_id": movie_id,
+            "title": degrees.movie_info(movie_id)["title"],
+            "person_id": person_id,
+            "name": degrees.person(person_id)["name"],
+        })
+    return steps
+
+
+class Server():
+    """
+    asyncio HTTP front end over the loaded dataset and a search pool.
+    """
+
+    def __init__(self, options, workers):
+        self.metrics = Metrics()
+        self.pool = ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(options,)
+        )
+        # Name lookups and deltas on this process's data share a single
+        # thread, so a lookup never sees a delta half applied
+        self.local = ThreadPoolExecutor(1)
+        # Copies of the deltas applied so far, in order, which workers
+        # read instead of the originals in case those change
+        self.spool = tempfile.mkdtemp(prefix="degrees-deltas-")
+        self.deltas = []
+
+    async def handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            # Drain headers; only GET without a body is supported
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2 or parts[0] != "GET":
+                status, body = 405, {"error": "only GET is supported"}
+            else:
+                url = urlsplit(parts[1])
+                endpoint = url.path
+                start = time.perf_counter()
+                try:
+                    status, body = await self.dispatch(
+                        endpoint, parse_qs(url.query)
+                    )
+                except Exception as e:
+                    # e.g. BrokenProcessPool, or a bug in a search
+                    traceback.print_exc()
+                    status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+                self.metrics.record(
+                    endpoint, time.perf_counter() - start, status >= 400
+                )
+            await self.respond(writer, status, body)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, endpoint, query):
+        def arg(name, default=None):
+            return query.get(name, [default])[0]
+
+        if endpoint == "/metrics":
+            return 200, self.metrics.report()
+        if endpoint == "/names":
+            if arg("q") is None:
+                return 400, {"error": "missing q"}
+            try:
+                limit = int(arg("limit", 10))
+            except ValueError:
+                return 400, {"error": "limit must be an integer"}
+            # The name index lives in this process; a thread keeps the
+            # event loop serving other clients during the lookup
+            loop = asyncio.get_running_loop()
+            return 200, await loop.run_in_executor(
+                self.local, _find_names, arg("q"), limit
+            )
+        if endpoint == "/delta":
+            if arg("path") is None:
+                return 400, {"error": "missing path"}
+            return await self.apply_delta(arg("path"))
+        if endpoint == "/path":
+            source, target = arg("source"), arg("target")
+            mode = arg("mode", "bfs")
+            if source is None or target is None:
+                return 400, {"error": "missing source or target"}
+            if mode not in degrees.SEARCHES:
+                return 400, {"error": f"unknown mode {mode}"}
+            loop = asyncio.get_running_loop()
+            try:
+                path = await loop.run_in_executor(
+                    self.pool, _find_path, source, target, mode,
+                    tuple(self.deltas)
+                )
+            except KeyError as e:
+                return 404, {"error": f"unknown person {e.args[0]}"}
+            return 200, {
+                "degrees": None if path is None else len(path),
+                "path": path,
+            }
+        return 404, {"error": f"no endpoint {endpoint}"}
+
+    async def apply_delta(self, path):
+        """
+        Applies the delta CSV at path here and queues it for the pool
+        workers, which apply it before their next search.
+        """
+        copy = os.path.join(self.spool, f"{len(self.deltas):06}.csv")
+        try:
+            shutil.copyfile(path, copy)
+        except OSError as e:
+            return 400, {"error": f"cannot read {path}: {e.strerror}"}
+        loop = asyncio.get_running_loop()
+        try:
+            applied = await loop.run_in_executor(
+                self.local, updates.apply_delta, copy
+            )
+        except (updates.UpdateError, KeyError, ValueError) as e:
+            # The rows before the bad one stay applied, and workers will
+            # stop at the same row
+            self.deltas.append(copy)
+            return 400, {"error": f"{type(e).__name__}: {e}"}
+        self.deltas.append(copy)
+        return 200, {"applied": applied, "deltas": len(self.deltas)}
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.local.shutdown()
+        shutil.rmtree(self.spool, ignore_errors=True)
+
+    async def respond(self, writer, status, body):
+        data = json.dumps(body).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found",
+                  405: "Method Not Allowed",
+                  500: "Internal Server Error"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + data
+        )
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def _describe(person_id):
+    info = degrees.person(person_id)
+    return {"name": info["name"], "birth": info["birth"]}
+
+
+def _find_names(query, limit):
+    """
+    Runs on an executor thread; returns the matches as a list of dicts.
+    """
+    return [
+        {"person_id": pid, **_describe(pid)}
+        for pid in degrees.search_names(query, limit)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="server.py")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--landmarks", type=int, default=16, metavar="N",
+                        help="landmarks for astar queries (0: build lazily)")
+    args = parser.parse_args()
+
+    # The compact snapshot makes loading in every worker a cheap mmap;
+    # it also holds the landmark distances, built here once
+    options = {"directory": args.directory, "compact": True,
+               "landmarks": args.landmarks}
+    print("Loading data...")
+    degrees.load_data(**options, index_names=True)
+    server = Server(options, args.workers)
+    print(f"Serving on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Generates synthetic IMDB-like datasets for scale benchmarks.
+
+Writes people.csv, movies.csv and stars.csv in the same schema as the
+small dataset. Cast sizes follow a truncated power law and popular people
+star in many more movies than others, like the real co-star graph.
+
+Usage: python synthetic.py directory --edges N [--seed S]
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import random
+from bisect import bisect
+
+FIRST_NAMES = [
+    "Alex", "Anna", "Ben", "Carla", "Chris", "Dana", "Emma", "Frank",
+    "Grace", "Henry", "Ivy", "Jack", "Julia", "Kevin", "Laura", "Maria",
+    "Mark", "Nina", "Oscar", "Paul", "Rosa", "Sam", "Tom", "Vera",
+]
+LAST_NAMES = [
+    "Adams", "Bacon", "Brown", "Cruise", "Davis", "Evans", "Garcia",
+    "Hanks", "Hill", "Jones", "King", "Lee", "Lopez", "Miller", "Moore",
+    "Nguyen", "Smith", "Stone", "Taylor", "Walker", "White", "Young",
+]
+WORDS = [
+    "Dark", "Last", "Lost", "Night", "City", "Road", "Love", "War",
+    "Storm", "River", "Secret", "Blue", "Fire", "Dream", "Summer", "Ghost",
+]
+
+
+def power_law(rng, exponent, low, high):
+    """Samples an integer in [low, high] with P(k) ~ k^-exponent."""
+    # Inverse transform of the continuous Pareto distribution
+    u = rng.random()
+    a = 1 - exponent
+    k = ((high ** a - low ** a) * u + low ** a) ** (1 / a)
+    return min(high, int(k))
+
+
+def generate(directory, edges, seed=0, cast_exponent=2.2,
+             popularity_exponent=0.8, max_cast=200):
+    """
+    Writes a dataset with roughly edges star credits to directory and
+    returns (people, movies, credits) counts.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    num_people = max(2, edges // 3)
+
+    # Zipf-like popularity: the person at rank r has weight r^-exponent
+    cumulative = list(itertools.accumulate(
+        (r + 1) ** -popularity_exponent for r in range(num_people)
+    ))
+    total = cumulative[-1]
+    ranks = list(range(num_people))
+    rng.shuffle(ranks)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        f.write("id,name,birth\n")
+        for person in range(num_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            writer.writerow([person + 1, name, rng.randint(1920, 2005)])
+
+    credits = 0
+    num_movies = 0
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w",
+                 encoding="utf-8", newline="") as stars_file:
+        movies = csv.writer(movies_file, quoting=csv.QUOTE_NONNUMERIC)
+        movies_file.write("id,title,year\n")
+        stars_file.write("person_id,movie_id\n")
+        while credits < edges:
+            num_movies += 1
+            title = " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+            movies.writerow([num_movies, title, rng.randint(1930, 2024)])
+
+            cast_size = min(
+                power_law(rng, cast_exponent, 1, max_cast), edges - credits
+            )
+            cast = {
+                ranks[bisect(cumulative, rng.random() * total) % num_people]
+                for _ in range(cast_size)
+            }
+            for person in cast:
+                stars_file.write(f"{person + 1},{num_movies}\n")
+            credits += len(cast)
+    return num_people, num_movies, credits
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="synthetic.py")
+    parser.add_argument("directory")
+    parser.add_argument("--edges", type=int, required=True,
+                        help="number of star credits to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    people, movies, credits = generate(args.directory, args.edges, args.seed)
+    print(f"Wrote {people} people, {movies} movies, {credits} credits "
+          f"to {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
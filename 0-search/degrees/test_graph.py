@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+
+from graph import SNAPSHOT, SNAPSHOT_MAGIC, CSRGraph, load_cached, source_stats
+
+
+def copy_small(tmp_path):
+    directory = tmp_path / "small"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "small"),
+                    directory, ignore=shutil.ignore_patterns(SNAPSHOT))
+    return str(directory)
+
+
+def snapshot_of(directory):
+    path = os.path.join(directory, SNAPSHOT)
+    load_cached(directory)
+    with open(path, "rb") as f:
+        return path, f.read()
+
+
+def test_truncated_snapshot_is_rebuilt(tmp_path):
+    directory = copy_small(tmp_path)
+    path, data = snapshot_of(directory)
+    for length in (len(data) - 8, len(data) // 2, len(SNAPSHOT_MAGIC) + 4):
+        with open(path, "wb") as f:
+            f.write(data[:length])
+        assert CSRGraph.load(path, source_stats(directory)) is None
+        graph = load_cached(directory)
+        assert graph.num_people == 16
+        assert CSRGraph.load(path, source_stats(directory)) is not None
+
+
+def test_header_missing_key_is_rejected(tmp_path):
+    directory = copy_small(tmp_path)
+    path, data = snapshot_of(directory)
+    start = len(SNAPSHOT_MAGIC) + 8
+    length = int.from_bytes(data[len(SNAPSHOT_MAGIC):start], "little")
+    header = json.loads(data[start:start + length])
+    del header["sections"]
+    encoded = json.dumps(header).encode("utf-8").ljust(length)
+    with open(path, "wb") as f:
+        f.write(data[:start] + encoded + data[start + length:])
+    assert CSRGraph.load(path, source_stats(directory)) is None
+    assert load_cached(directory).num_people == 16
+
+
+def test_component_labels_are_stored(tmp_path):
+    import degrees
+    directory = copy_small(tmp_path)
+    degrees.load_data(directory, compact=True)
+    built = degrees.component_index.stats()
+    degrees.load_data(directory, compact=True)
+    assert isinstance(degrees.component_index.sets.parent, memoryview)
+    assert degrees.component_index.stats() == built
+    assert degrees.shortest_path("102", "129") == [("104257", "129")]
+
+
+def test_resaving_a_mapped_graph_keeps_sections(tmp_path):
+    import degrees
+    directory = copy_small(tmp_path)
+    degrees.load_data(directory, compact=True, components=False)
+    people = degrees.graph.num_people
+    # Adding the component labels rewrites the snapshot from mapped arrays
+    degrees.load_data(directory, compact=True)
+    degrees.load_data(directory, compact=True)
+    assert degrees.graph.num_people == people
+    assert degrees.shortest_path("102", "129") == [("104257", "129")]
+
+
+def test_landmarks_are_stored(tmp_path):
+    import degrees
+    directory = copy_small(tmp_path)
+    degrees.load_data(directory, compact=True, landmarks=3)
+    built = degrees.landmark_index
+    estimate = degrees.distance_estimate("102", "129")
+    degrees.load_data(directory, compact=True, landmarks=3)
+    index = degrees.landmark_index
+    assert isinstance(index.distances[0], memoryview)
+    assert index.landmarks == built.landmarks
+    assert degrees.distance_estimate("102", "129") == estimate
+    assert degrees.shortest_path("102", "129", mode="astar") == \
+        [("104257", "129")]
+    degrees.load_data(directory, compact=True, landmarks=2)
+    assert len(degrees.landmark_index.landmarks) == 2
+
+
+def test_more_landmarks_than_people_are_kept(tmp_path):
+    import degrees
+    directory = copy_small(tmp_path)
+    degrees.load_data(directory, compact=True, landmarks=100)
+    assert len(degrees.landmark_index.landmarks) == degrees.graph.num_people
+    saved = os.stat(os.path.join(directory, SNAPSHOT)).st_mtime_ns
+    degrees.load_data(directory, compact=True, landmarks=100)
+    assert isinstance(degrees.landmark_index.distances[0], memoryview)
+    assert os.stat(os.path.join(directory, SNAPSHOT)).st_mtime_ns == saved
+
+
+def test_flat_search_reuses_clean_buffers(tmp_path):
+    import degrees
+    directory = copy_small(tmp_path)
+    degrees.load_data(directory, compact=True)
+    for source, target in (("102", "129"), ("102", "398"), ("129", "102")):
+        assert degrees.shortest_path(source, target, mode="flat") == \
+            degrees.shortest_path(source, target, mode="bfs")
+        parents = degrees._flat_buffers[1]
+        assert all(parent == degrees.UNSET for parent in parents)
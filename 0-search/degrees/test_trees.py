@@ -0,0 +1,34 @@
+from trees import FlatTree, TreeCache, tree_path
+
+# A path 0 - 1 - 2 - 3 with action 10 * state on each edge
+EDGES = {0: [1], 1: [0, 2], 2: [1, 3], 3: [2]}
+
+
+def neighbors(state):
+    return [(10 * neighbor, neighbor) for neighbor in EDGES[state]]
+
+
+def test_flat_tree_paths_match_dict_trees():
+    cache = TreeCache()
+    flat = cache.tree(0, neighbors, size=4)
+    assert isinstance(flat, FlatTree)
+    tree = TreeCache().tree(0, neighbors)
+    for target in range(4):
+        assert tree_path(flat, target) == tree_path(tree, target)
+    assert tree_path(flat, 3) == [(10, 1), (20, 2), (30, 3)]
+
+
+def test_cache_is_bounded_by_bytes():
+    size = FlatTree.build(0, neighbors, 4).nbytes()
+    cache = TreeCache(max_bytes=2 * size)
+    for source in range(4):
+        cache.tree(source, neighbors, size=4)
+    assert list(cache.trees) == [2, 3]
+    assert cache.info()["bytes"] == 2 * size
+    cache.discard(2)
+    assert cache.nbytes == size
+
+    # A tree larger than the whole budget is returned but not kept
+    small = TreeCache(max_bytes=size - 1)
+    assert tree_path(small.tree(0, neighbors, size=4), 2) == [(10, 1), (20, 2)]
+    assert small.info()["size"] == 0
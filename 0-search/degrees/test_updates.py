@@ -0,0 +1,119 @@
+import math
+import os
+import shutil
+
+import degrees
+import updates
+from graph import SNAPSHOT
+
+SMALL = os.path.join(os.path.dirname(__file__), "small")
+
+DELTA = """op,kind,id,label,year,person_id,movie_id
+add,person,999999,New Person,1990,,
+add,movie,888888,New Movie,2024,,
+add,star,,,,999999,888888
+add,star,,,,914612,888888
+remove,star,,,,158,112384
+"""
+
+
+def load(components, compact=False, directory=SMALL):
+    for data in (degrees.names, degrees.people, degrees.movies):
+        data.clear()
+    degrees.load_data(directory, compact=compact, components=components)
+
+
+def copy_small(tmp_path):
+    directory = tmp_path / "small"
+    shutil.copytree(SMALL, directory, ignore=shutil.ignore_patterns(SNAPSHOT))
+    return str(directory)
+
+
+def test_add_person_keeps_landmarks():
+    for components in (True, False):
+        load(components)
+        index = degrees.build_landmarks()
+        updates.add_person("999999", "New Person")
+        assert degrees.landmark_index is index and not index.stale
+        assert degrees.distance_estimate("999999", "102") == (math.inf, math.inf)
+        assert degrees.shortest_path("999999", "102", mode="astar") is None
+
+
+def test_add_person_then_star_is_searchable():
+    load(False)
+    degrees.build_landmarks()
+    updates.add_person("999999", "New Person")
+    updates.add_star("999999", "104257")
+    assert not degrees.landmark_index.admissible
+    lower, upper = degrees.distance_estimate("999999", "102")
+    assert lower <= 1 <= upper
+    assert degrees.shortest_path("999999", "102", mode="astar") == \
+        degrees.shortest_path("999999", "102", mode="bfs")
+
+
+def test_removed_credits_keep_landmarks_admissible():
+    load(True)
+    index = degrees.build_landmarks()
+    updates.remove_star("158", "112384")
+    assert index.stale and index.admissible
+    assert degrees.shortest_path("158", "102", mode="astar") == \
+        degrees.shortest_path("158", "102", mode="bfs")
+    assert degrees.landmark_index is index
+
+
+def test_edits_drop_only_affected_trees():
+    for compact in (False, True):
+        load(False, compact)
+        degrees.shortest_path("914612", "102", mode="tree")
+        degrees.shortest_path("200", "129", mode="tree")
+        isolated = next(iter(degrees.tree_cache.trees.values()))
+        updates.add_star("129", "112384")
+        # Emma Watson shares no component with the edited cast
+        assert list(degrees.tree_cache.trees.values()) == [isolated]
+        assert degrees.shortest_path("200", "129", mode="tree") == \
+            degrees.shortest_path("200", "129", mode="bfs") == \
+            [("112384", "129")]
+
+
+def test_compact_graph_applies_deltas(tmp_path):
+    directory = copy_small(tmp_path)
+    delta = tmp_path / "delta.csv"
+    delta.write_text(DELTA, encoding="utf-8")
+
+    # Write the snapshot, so the compact run edits mapped arrays
+    degrees.load_data(directory, compact=True)
+    answers = []
+    for compact in (False, True):
+        load(True, compact, directory)
+        if compact:
+            assert isinstance(degrees.component_index.sets.parent, memoryview)
+        degrees.build_name_index()
+        assert updates.apply_delta(str(delta)) == 5
+        assert degrees.person_id_for_name("New Person") == "999999"
+        assert degrees.search_names("new persn") == ["999999"]
+        assert degrees.movie_info("888888")["stars"] == {"999999", "914612"}
+        assert degrees.connected("914612", "999999")
+        answers.append([
+            degrees.shortest_path(source, target, mode=mode)
+            for source, target in (("999999", "914612"), ("158", "102"),
+                                   ("914612", "102"))
+            for mode in ("bfs", "flat", "tree", "astar")
+        ])
+    assert answers[0] == answers[1]
+    assert answers[1][0] == [("888888", "914612")]
+    assert all(path is None for path in answers[1][-4:])
+
+
+def test_compact_graph_removes_people(tmp_path):
+    load(True, True, copy_small(tmp_path))
+    degrees.build_name_index()
+    updates.remove_person("158")
+    assert degrees.person_id_for_name("Tom Hanks") is None
+    assert degrees.search_names("Tom Hanks") == []
+    assert "158" not in degrees.movie_info("112384")["stars"]
+    assert degrees.shortest_path("102", "398") == \
+        [("112384", "641"), ("109830", "398")]
+    updates.add_person("158", "Tom Hanks", "1956")
+    assert degrees.person_id_for_name("Tom Hanks") == "158"
+    assert degrees.person("158")["movies"] == set()
+    assert not degrees.connected("158", "102")
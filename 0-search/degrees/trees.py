@@ -0,0 +1,176 @@
+"""
+Single-source BFS trees and a bounded LRU cache of them, for workloads
+that ask many shortest-path questions from the same source.
+"""
+
+import sys
+from array import array
+from collections import OrderedDict, deque
+
+# Parent of a state not reached yet in an array-backed search
+UNSET = -1
+
+
+def bfs_tree(source, neighbors):
+    """
+    Runs a full BFS from source and returns a dict mapping every reachable
+    state to (parent state, action), with the source mapped to None.
+    """
+    tree = {source: None}
+    queue = deque([source])
+    while queue:
+        state = queue.popleft()
+        for action, neighbor in neighbors(state):
+            if neighbor not in tree:
+                tree[neighbor] = (state, action)
+                queue.append(neighbor)
+    return tree
+
+
+class FlatTree():
+    """
+    BFS tree over the integer states 0..size-1 (CSR person indices),
+    stored as parent and action arrays instead of a dict. Reads like the
+    dicts of bfs_tree: `state in tree` and `tree[state]`.
+    """
+
+    def __init__(self, source, parents, actions):
+        self.source = source
+        self.parents = parents
+        self.actions = actions
+
+    @classmethod
+    def build(cls, source, neighbors, size):
+        parents = array("i", [UNSET]) * size
+        actions = array("i", [UNSET]) * size
+        parents[source] = source
+        queue = deque([source])
+        while queue:
+            state = queue.popleft()
+            for action, neighbor in neighbors(state):
+                if parents[neighbor] == UNSET:
+                    parents[neighbor] = state
+                    actions[neighbor] = action
+                    queue.append(neighbor)
+        return cls(source, parents, actions)
+
+    def __contains__(self, state):
+        # People added after the build are beyond the arrays
+        return state < len(self.parents) and self.parents[state] != UNSET
+
+    def __getitem__(self, state):
+        if state == self.source:
+            return None
+        if self.parents[state] == UNSET:
+            raise KeyError(state)
+        return self.parents[state], self.actions[state]
+
+    def nbytes(self):
+        return (len(self.parents) * self.parents.itemsize
+                + len(self.actions) * self.actions.itemsize)
+
+
+def tree_nbytes(tree):
+    """
+    Returns the bytes held by a tree from bfs_tree (estimated from the
+    dict and its (parent, action) tuples) or a FlatTree.
+    """
+    if isinstance(tree, FlatTree):
+        return tree.nbytes()
+    return sys.getsizeof(tree) + (len(tree) - 1) * sys.getsizeof((0, 0))
+
+
+def tree_path(tree, target):
+    """
+    Returns the list of (action, state) pairs leading from the tree's
+    source to target, or None if target was not reached.
+    """
+    if target not in tree:
+        return None
+    solution = []
+    while tree[target] is not None:
+        parent, action = tree[target]
+        solution.append((action, target))
+        target = parent
+    solution.reverse()
+    return solution
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of BFS trees keyed by source state.
+
+    A tree of a large component is big, so the cache is bounded by the
+    bytes its trees hold as well as by their number.
+    """
+
+    def __init__(self, maxsize=32, max_bytes=128 * 2 ** 20):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()
+        # Source -> bytes of its cached tree
+        self.sizes = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def tree(self, source, neighbors, size=None):
+        """
+        Returns the BFS tree for source, building it with neighbors
+        on a miss and evicting the least recently used trees while over
+        either bound. With size, states are the integers 0..size-1 and
+        the tree is a FlatTree.
+        """
+        if source in self.trees:
+            self.hits += 1
+            self.trees.move_to_end(source)
+            return self.trees[source]
+        self.misses += 1
+        if size is None:
+            tree = bfs_tree(source, neighbors)
+        else:
+            tree = FlatTree.build(source, neighbors, size)
+        nbytes = tree_nbytes(tree)
+        if self.maxsize > 0 and nbytes <= self.max_bytes:
+            self.trees[source] = tree
+            self.sizes[source] = nbytes
+            self.nbytes += nbytes
+            while (len(self.trees) > self.maxsize
+                   or self.nbytes > self.max_bytes):
+                self.discard(next(iter(self.trees)))
+        return tree
+
+    def discard(self, source):
+        """Drops the tree of source, if cached."""
+        if self.trees.pop(source, None) is not None:
+            self.nbytes -= self.sizes.pop(source)
+
+    def invalidate(self, states):
+        """
+        Drops the trees that reached any of states. An edit of the
+        credits among states changes no path of a tree that reached
+        none of them, so every other tree stays valid.
+        """
+        states = list(states)
+        for source, tree in list(self.trees.items()):
+            if any(state in tree for state in states):
+                self.discard(source)
+
+    def clear(self):
+        """Drops every cached tree and resets the counters."""
+        self.trees.clear()
+        self.sizes.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Returns hit/miss counters and current size as a dict."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.trees),
+            "maxsize": self.maxsize,
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,206 @@
+"""
+In-place updates of the loaded degrees dataset.
+
+Adds and removes people, movies and star credits in the loaded data,
+either the names/people/movies dicts or the overlay of the CSR graph,
+and keeps the derived indexes in degrees consistent, so a resident
+process can apply daily deltas without reloading.
+
+Delta CSVs have the header
+
+    op,kind,id,label,year,person_id,movie_id
+
+where op is "add" or "remove" and kind is "person" (id, label = name,
+year = birth), "movie" (id, label = title, year) or "star" (person_id,
+movie_id). Unused columns may be left empty.
+"""
+
+import csv
+
+import degrees
+
+
+class UpdateError(Exception):
+    pass
+
+
+def _credits_changed(states, added):
+    """
+    Updates derived state after the credits among states (person_ids,
+    or CSR indices) changed. Only the cached trees and co-star entries
+    that reached them are dropped; landmark distances are marked stale,
+    and inadmissible if a credit was added.
+    """
+    states = list(states)
+    degrees.tree_cache.invalidate(states)
+    if degrees.costar_index is not None:
+        for state in states:
+            degrees.costar_index.discard(state)
+    index = degrees.landmark_index
+    if index is not None:
+        index.stale = True
+        if added:
+            index.admissible = False
+
+
+def _components_stale():
+    if degrees.component_index is not None:
+        degrees.component_index.stale = True
+
+
+def add_person(person_id, name, birth=""):
+    """Adds a person without movies."""
+    graph = degrees.graph
+    if graph is not None:
+        try:
+            state = graph.add_person(person_id, name, birth)
+        except ValueError as e:
+            raise UpdateError(str(e))
+    else:
+        if person_id in degrees.people:
+            raise UpdateError(f"person {person_id} already exists")
+        degrees.people[person_id] = {
+            "name": name, "birth": birth, "movies": set()
+        }
+        degrees.names.setdefault(name.lower(), set()).add(person_id)
+        state = person_id
+    if degrees.name_index is not None:
+        degrees.name_index.add(person_id, name)
+    if degrees.component_index is not None:
+        degrees.component_index.add(state)
+    # Without credits the person is reached by no landmark, which is
+    # what the landmark index assumes of people it does not know
+
+
+def remove_person(person_id):
+    """Removes a person and all of their star credits."""
+    graph = degrees.graph
+    if graph is not None:
+        p = graph.person_index(person_id)
+        for m in list(graph.movies_of(p)):
+            remove_star(person_id, graph.movie_id(m))
+        name = graph.names[p]
+        graph.remove_person(p)
+        state = p
+    else:
+        person = degrees.people[person_id]
+        for movie_id in list(person["movies"]):
+            remove_star(person_id, movie_id)
+        del degrees.people[person_id]
+        name = person["name"]
+        key = name.lower()
+        degrees.names[key].discard(person_id)
+        if not degrees.names[key]:
+            del degrees.names[key]
+        state = person_id
+    if degrees.name_index is not None:
+        degrees.name_index.remove(person_id, name)
+    # Their credits are gone, but a tree from them may still be cached
+    degrees.tree_cache.invalidate([state])
+    _components_stale()
+
+
+def add_movie(movie_id, title, year=""):
+    """Adds a movie without stars."""
+    graph = degrees.graph
+    if graph is not None:
+        try:
+            graph.add_movie(movie_id, title, year)
+        except ValueError as e:
+            raise UpdateError(str(e))
+        return
+    if movie_id in degrees.movies:
+        raise UpdateError(f"movie {movie_id} already exists")
+    degrees.movies[movie_id] = {"title": title, "year": year, "stars": set()}
+
+
+def remove_movie(movie_id):
+    """Removes a movie and all of its star credits."""
+    graph = degrees.graph
+    if graph is not None:
+        m = graph.movie_index(movie_id)
+        for p in list(graph.stars_of(m)):
+            remove_star(graph.person_id(p), movie_id)
+        graph.remove_movie(m)
+        return
+    for person_id in list(degrees.movies[movie_id]["stars"]):
+        remove_star(person_id, movie_id)
+    del degrees.movies[movie_id]
+
+
+def add_star(person_id, movie_id):
+    """Credits an existing person in an existing movie."""
+    graph = degrees.graph
+    if graph is not None:
+        m = graph.movie_index(movie_id)
+        if not graph.add_star(graph.person_index(person_id), m):
+            return
+        cast = graph.stars_of(m)
+    else:
+        person = degrees.people[person_id]
+        movie = degrees.movies[movie_id]
+        if movie_id in person["movies"]:
+            return
+        person["movies"].add(movie_id)
+        movie["stars"].add(person_id)
+        cast = movie["stars"]
+
+    # The new credit only ever merges components
+    index = degrees.component_index
+    if index is not None and not index.stale:
+        index.union_all(cast)
+    _credits_changed(cast, added=True)
+
+
+def remove_star(person_id, movie_id):
+    """Removes a star credit."""
+    graph = degrees.graph
+    if graph is not None:
+        m = graph.movie_index(movie_id)
+        cast = list(graph.stars_of(m))
+        if not graph.remove_star(graph.person_index(person_id), m):
+            return
+    else:
+        movie = degrees.movies[movie_id]
+        if person_id not in movie["stars"]:
+            return
+        cast = list(movie["stars"])
+        degrees.people[person_id]["movies"].discard(movie_id)
+        movie["stars"].discard(person_id)
+    _components_stale()
+    _credits_changed(cast, added=False)
+
+
+def apply_delta(path):
+    """
+    Applies the rows of a delta CSV in order and returns how many were
+    applied. Components are relabelled once at the end if needed.
+    """
+    handlers = {
+        ("add", "person"): lambda r: add_person(r["id"], r["label"], r["year"]),
+        ("remove", "person"): lambda r: remove_person(r["id"]),
+        ("add", "movie"): lambda r: add_movie(r["id"], r["label"], r["year"]),
+        ("remove", "movie"): lambda r: remove_movie(r["id"]),
+        ("add", "star"): lambda r: add_star(r["person_id"], r["movie_id"]),
+        ("remove", "star"): lambda r: remove_star(r["person_id"], r["movie_id"]),
+    }
+    applied = 0
+    with open(path, encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), 2):
+            try:
+                handler = handlers[(row["op"], row["kind"])]
+            except KeyError:
+                raise UpdateError(
+                    f"{path}:{line}: unknown op/kind {row['op']}/{row['kind']}"
+                )
+            handler(row)
+            applied += 1
+    refresh()
+    return applied
+
+
+def refresh():
+    """Relabels components if removals have split them."""
+    index = degrees.component_index
+    if index is not None and index.stale:
+        degrees.build_components()
@@ -0,0 +1,127 @@
+"""
+Alpha-beta search for Tic Tac Toe.
+
+Returns the same move as tictactoe.minimax while visiting far fewer
+positions: replies are tried center first, then corners, then edges, so
+strong moves raise the bounds early and prune the rest.
+
+Usage: python alphabeta.py   (compares node counts on the empty board)
+"""
+
+import math
+
+import tictactoe as ttt
+
+
+def move_priority(action, size):
+    """
+    Returns 0 for the center, 1 for corners and 2 for other cells,
+    the order in which replies are searched.
+    """
+    i, j = action
+    middle = (size - 1) / 2
+    if i == middle and j == middle:
+        return 0
+    if i in (0, size - 1) and j in (0, size - 1):
+        return 1
+    return 2
+
+
+def ordered_actions(board):
+    """Returns the available actions, center first, then corners, then edges."""
+    return sorted(
+        ttt.actions(board), key=lambda action: move_priority(action, len(board))
+    )
+
+
+class AlphaBeta():
+    """
+    Alpha-beta minimax whose `nodes` attribute counts the positions
+    visited (calls of max_value and min_value) since it was created.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+
+    def minimax(self, board):
+        """
+        Returns the optimal action for the current player on the board.
+
+        Root actions are tried in tictactoe.actions order and only a
+        strictly better value replaces the best move, which makes the
+        choice among equally good moves match tictactoe.minimax.
+        """
+        if ttt.terminal(board):
+            return None
+        maximizing = ttt.player(board) == ttt.X
+        alpha, beta = -math.inf, math.inf
+        best = None
+        for action in ttt.actions(board):
+            child = ttt.result(board, action)
+            if maximizing:
+                v = self.min_value(child, alpha, beta)
+                if best is None or v > alpha:
+                    alpha, best = v, action
+            else:
+                v = self.max_value(child, alpha, beta)
+                if best is None or v < beta:
+                    beta, best = v, action
+        return best
+
+    def max_value(self, board, alpha, beta):
+        self.nodes += 1
+        if ttt.monitor is not None:
+            ttt.monitor.tick()
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        v = -math.inf
+        for action in ordered_actions(board):
+            v = max(v, self.min_value(ttt.result(board, action), alpha, beta))
+            if v >= beta:
+                return v
+            alpha = max(alpha, v)
+        return v
+
+    def min_value(self, board, alpha, beta):
+        self.nodes += 1
+        if ttt.monitor is not None:
+            ttt.monitor.tick()
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        v = math.inf
+        for action in ordered_actions(board):
+            v = min(v, self.max_value(ttt.result(board, action), alpha, beta))
+            if v <= alpha:
+                return v
+            beta = min(beta, v)
+        return v
+
+
+def alphabeta(board):
+    """Returns the optimal action for the current player on the board."""
+    return AlphaBeta().minimax(board)
+
+
+def minimax_nodes(board):
+    """
+    Returns the number of positions tictactoe.minimax visits on board
+    without its transposition table.
+    """
+    def count(board):
+        if ttt.terminal(board):
+            return 1
+        return 1 + sum(count(ttt.result(board, a)) for a in ttt.actions(board))
+
+    return sum(count(ttt.result(board, a)) for a in ttt.actions(board))
+
+
+def main():
+    board = ttt.initial_state()
+    search = AlphaBeta()
+    move = search.minimax(board)
+    print(f"alpha-beta: move {move}, {search.nodes} nodes")
+    print(f"minimax:    {minimax_nodes(board)} nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Bitboard Tic Tac Toe engine.
+
+A position is a pair of 9-bit integers (x, o) with bit 3 * i + j set when
+that player holds cell (i, j). Moves, turn, winner and terminal checks
+are integer operations and table lookups instead of list copies and
+scans. from_board/to_board convert to and from the list board format of
+tictactoe.py, and minimax(board) is a drop-in replacement for
+tictactoe.minimax.
+"""
+
+from functools import lru_cache
+
+import tictactoe as ttt
+
+FULL = 0b111111111
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# WINS[bits] is True when bits contain a complete line
+WINS = tuple(
+    any(bits & mask == mask for mask in WIN_MASKS) for bits in range(FULL + 1)
+)
+
+
+def from_board(board):
+    """Returns the (x, o) bitboards of a 3x3 list board."""
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == ttt.X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == ttt.O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """Returns the list board of (x, o) bitboards."""
+    return [
+        [ttt.X if x >> (3 * i + j) & 1 else ttt.O if o >> (3 * i + j) & 1
+         else ttt.EMPTY for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def player(x, o):
+    """Returns ttt.X or ttt.O, whoever moves next."""
+    return ttt.X if x.bit_count() == o.bit_count() else ttt.O
+
+
+def actions(x, o):
+    """Returns the free cells as bit indices in row-major order."""
+    free = ~(x | o) & FULL
+    return [cell for cell in range(9) if free >> cell & 1]
+
+
+def result(x, o, cell):
+    """Returns the bitboards after the player to move takes cell."""
+    bit = 1 << cell
+    if (x | o) & bit:
+        raise Exception("Action is not valid")
+    if x.bit_count() == o.bit_count():
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """Returns ttt.X, ttt.O or None."""
+    if WINS[x]:
+        return ttt.X
+    if WINS[o]:
+        return ttt.O
+    return None
+
+
+def terminal(x, o):
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def utility(x, o):
+    return 1 if WINS[x] else -1 if WINS[o] else 0
+
+
+@lru_cache(maxsize=None)
+def value(x, o):
+    """Returns the minimax value of a position (1, 0 or -1)."""
+    if ttt.monitor is not None:
+        ttt.monitor.tick()
+    if terminal(x, o):
+        return utility(x, o)
+    values = (value(*result(x, o, cell)) for cell in actions(x, o))
+    return max(values) if x.bit_count() == o.bit_count() else min(values)
+
+
+def best_move(x, o):
+    """
+    Returns the bit index of the optimal move, the first in row-major
+    order among equally good ones, as tictactoe.minimax picks.
+    """
+    maximizing = x.bit_count() == o.bit_count()
+    best = None
+    for cell in actions(x, o):
+        v = value(*result(x, o, cell))
+        if best is None or (v > best[0] if maximizing else v < best[0]):
+            best = (v, cell)
+    return None if best is None else best[1]
+
+
+def minimax(board):
+    """Returns the optimal (i, j) action on a list board."""
+    if len(board) != 3 or ttt.win_length not in (None, 3):
+        raise ValueError("the bitboard engine only plays 3x3 with 3 in a row")
+    if terminal(*from_board(board)):
+        return None
+    return divmod(best_move(*from_board(board)), 3)
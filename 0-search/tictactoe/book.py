@@ -0,0 +1,76 @@
+"""
+Perfect-play move table for 3x3 Tic Tac Toe.
+
+Solves every reachable position once with tictactoe.minimax and writes
+the chosen move of each as one byte (cell 3 * i + j, or NO_MOVE) at
+offset encode(board) of a 3 ** 9 byte table, after a short magic
+header. tictactoe.load_book reads it back so that minimax becomes a
+table lookup.
+
+Usage: python book.py [path]   (default: book.bin next to this file)
+"""
+
+import os
+import sys
+import time
+
+import tictactoe as ttt
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+
+
+def reachable():
+    """
+    Yields every non-terminal position reachable from the empty 3x3
+    board, each once.
+    """
+    seen = set()
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        code = ttt.encode(board)
+        if code in seen or ttt.terminal(board):
+            continue
+        seen.add(code)
+        yield board
+        for action in ttt.actions(board):
+            stack.append(ttt.result(board, action))
+
+
+def solve():
+    """
+    Returns the move table as bytes: the minimax move of each reachable
+    position at its encoding, NO_MOVE everywhere else.
+    """
+    saved = ttt.book, ttt.win_length
+    ttt.book, ttt.win_length = None, None
+    try:
+        moves = bytearray([ttt.NO_MOVE]) * 3 ** 9
+        for board in reachable():
+            i, j = ttt.minimax(board)
+            moves[ttt.encode(board)] = 3 * i + j
+    finally:
+        ttt.book, ttt.win_length = saved
+    return bytes(moves)
+
+
+def write(path=BOOK):
+    """Solves the game and writes the move table to path."""
+    moves = solve()
+    with open(path, "wb") as f:
+        f.write(ttt.BOOK_MAGIC)
+        f.write(moves)
+    return moves
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else BOOK
+    start = time.perf_counter()
+    moves = write(path)
+    positions = sum(1 for cell in moves if cell != ttt.NO_MOVE)
+    print(f"{positions} positions solved in "
+          f"{time.perf_counter() - start:.2f}s, wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Time-bounded iterative deepening for N x N, k-in-a-row Tic Tac Toe.
+
+Full-depth minimax cannot finish beyond 3x3, so this engine runs
+alpha-beta to depth 1, 2, 3, ... until a wall-clock budget runs out and
+plays the best move of the deepest finished search. Positions at the
+depth cutoff are scored by a heuristic over every run of k cells: a run
+holding only one player's stones is worth 10 ** stones to that player.
+The score is kept up to date incrementally as stones are placed, and
+only cells near existing stones are considered on large boards.
+"""
+
+import math
+import time
+
+import tictactoe as ttt
+
+# Nodes searched between clock checks
+CHECK_EVERY = 64
+
+# On boards wider than this, only cells within NEAR of a stone are searched
+SMALL_BOARD = 5
+NEAR = 2
+
+
+class Timeout(Exception):
+    pass
+
+
+class Position():
+    """
+    Mutable flat board with incremental run counts and heuristic score.
+    Scores are from X's point of view.
+    """
+
+    def __init__(self, board, k):
+        self.size = n = len(board)
+        self.k = k
+        self.runs = [
+            tuple(i * n + j for i, j in line) for line in ttt.lines(n, k)
+        ]
+        self.cell_runs = [[] for _ in range(n * n)]
+        for r, run in enumerate(self.runs):
+            for cell in run:
+                self.cell_runs[cell].append(r)
+        self.x_counts = [0] * len(self.runs)
+        self.o_counts = [0] * len(self.runs)
+        self.cells = [ttt.EMPTY] * (n * n)
+        # Number of stones within NEAR cells of each cell
+        self.nearby = [0] * (n * n)
+        self.neighborhoods = [
+            [a * n + b
+             for a in range(max(0, i - NEAR), min(n, i + NEAR + 1))
+             for b in range(max(0, j - NEAR), min(n, j + NEAR + 1))]
+            for i in range(n) for j in range(n)
+        ]
+        self.score = 0
+        self.stones = 0
+        self.won = False
+        # Larger than any heuristic score
+        self.win_score = (len(self.runs) + 1) * 10 ** k
+        for i in range(n):
+            for j in range(n):
+                if board[i][j] is not ttt.EMPTY:
+                    self.won = self.place(i * n + j, board[i][j]) or self.won
+
+    @staticmethod
+    def run_score(x, o):
+        if x and o:
+            return 0
+        if x:
+            return 10 ** x
+        if o:
+            return -10 ** o
+        return 0
+
+    def place(self, cell, mark):
+        """Puts mark on cell; returns True if that completes a run."""
+        won = False
+        counts = self.x_counts if mark == ttt.X else self.o_counts
+        for r in self.cell_runs[cell]:
+            self.score -= self.run_score(self.x_counts[r], self.o_counts[r])
+            counts[r] += 1
+            self.score += self.run_score(self.x_counts[r], self.o_counts[r])
+            if counts[r] == self.k:
+                won = True
+        self.cells[cell] = mark
+        self.stones += 1
+        for other in self.neighborhoods[cell]:
+            self.nearby[other] += 1
+        return won
+
+    def unplace(self, cell):
+        counts = self.x_counts if self.cells[cell] == ttt.X else self.o_counts
+        for r in self.cell_runs[cell]:
+            self.score -= self.run_score(self.x_counts[r], self.o_counts[r])
+            counts[r] -= 1
+            self.score += self.run_score(self.x_counts[r], self.o_counts[r])
+        self.cells[cell] = ttt.EMPTY
+        self.stones -= 1
+        for other in self.neighborhoods[cell]:
+            self.nearby[other] -= 1
+
+    def to_move(self):
+        return ttt.X if self.stones % 2 == 0 else ttt.O
+
+    def candidates(self):
+        """
+        Returns the empty cells worth searching: all of them on small
+        boards, else those within NEAR cells of a stone (or the center
+        of an empty board).
+        """
+        n = self.size
+        if n <= SMALL_BOARD:
+            return [c for c in range(n * n) if self.cells[c] is ttt.EMPTY]
+        if self.stones == 0:
+            return [(n // 2) * n + n // 2]
+        return [
+            c for c in range(n * n)
+            if self.nearby[c] and self.cells[c] is ttt.EMPTY
+        ]
+
+    def urgency(self, cell):
+        """Returns how much the runs through cell matter to either player."""
+        return sum(
+            10 ** self.x_counts[r] + 10 ** self.o_counts[r]
+            for r in self.cell_runs[cell]
+        )
+
+
+class Search():
+    """
+    One iterative deepening search; `nodes` counts positions visited and
+    `depth` is the deepest completed iteration.
+    """
+
+    def __init__(self, position, deadline):
+        self.position = position
+        self.deadline = deadline
+        self.nodes = 0
+        self.depth = 0
+
+    def tick(self):
+        self.nodes += 1
+        if ttt.monitor is not None:
+            ttt.monitor.tick()
+        if self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise Timeout()
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Returns the value of the position for the player to move.
+        """
+        self.tick()
+        position = self.position
+        sign = 1 if position.to_move() == ttt.X else -1
+        moves = position.candidates()
+        if not moves:
+            return 0
+        if depth == 0:
+            return sign * position.score
+        moves.sort(key=position.urgency, reverse=True)
+        mark = position.to_move()
+        best = -math.inf
+        for cell in moves:
+            if position.place(cell, mark):
+                # Prefer quicker wins
+                value = position.win_score - ply
+            else:
+                value = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            position.unplace(cell)
+            if value > best:
+                best = value
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break
+        return best
+
+    def root(self, depth, ordered):
+        """
+        Searches every root move to depth and returns them ordered
+        best first, with the best value.
+        """
+        position = self.position
+        mark = position.to_move()
+        alpha = -math.inf
+        scored = []
+        for cell in ordered:
+            if position.place(cell, mark):
+                value = position.win_score
+            else:
+                value = -self.negamax(depth - 1, -math.inf, -alpha, 1)
+            position.unplace(cell)
+            scored.append((value, cell))
+            alpha = max(alpha, value)
+        scored.sort(key=lambda item: -item[0])
+        return [cell for _, cell in scored], scored[0][0]
+
+
+def minimax(board, budget=1.0, k=None, max_depth=None):
+    """
+    Returns the best (i, j) action found for the current player within
+    budget seconds, searching at least one ply.
+    """
+    deadline = time.perf_counter() + budget
+    k = k or ttt.win_length or len(board)
+    position = Position(board, k)
+    ordered = position.candidates()
+    if not ordered or position.won:
+        return None
+    ordered.sort(key=position.urgency, reverse=True)
+    empty = sum(1 for cell in position.cells if cell is ttt.EMPTY)
+    max_depth = min(max_depth or empty, empty)
+
+    search = Search(position, math.inf)
+    best = ordered[0]
+    for depth in range(1, max_depth + 1):
+        try:
+            ordered, value = search.root(depth, ordered)
+        except Timeout:
+            break
+        best = ordered[0]
+        search.depth = depth
+        # Later iterations only run against the clock
+        search.deadline = deadline
+        if abs(value) >= position.win_score - depth or time.perf_counter() > deadline:
+            break
+    minimax.last_search = search
+    return divmod(best, len(board))
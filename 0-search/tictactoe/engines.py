@@ -0,0 +1,25 @@
+"""
+Search engines the runner can play with, by name.
+
+Each engine takes a list board and returns the optimal (i, j) action;
+"deepening" returns the best action found within its time budget and
+"parallel" the best one at a fixed depth, and only these two scale past
+3x3.
+"""
+
+import alphabeta
+import bitboard
+import deepening
+import parallel
+import tictactoe as ttt
+
+# Engines that search the whole game tree and only play plain 3x3
+CLASSIC = ("minimax", "alphabeta", "bitboard")
+
+ENGINES = {
+    "minimax": ttt.minimax,
+    "alphabeta": alphabeta.alphabeta,
+    "bitboard": bitboard.minimax,
+    "deepening": deepening.minimax,
+    "parallel": parallel.minimax,
+}
@@ -0,0 +1,249 @@
+"""
+Search instrumentation for the Tic Tac Toe engines.
+
+profile(engine, board) runs one engine under instrumentation. It
+counts the positions searched (calls of max_value/min_value, value or
+negamax), terminal evaluations (utility; for the heuristic engines,
+winning Position.place calls and negamax calls at depth 0 or on a
+full board), successor boards built (result, or Position.place for
+the heuristic engines) and the time
+and nodes spent below each root move. The counting wrappers are
+installed only for the duration of the run, so uninstrumented searches
+pay nothing. Work done in the parallel engine's worker processes is
+not seen, only the parent's.
+
+Usage: python instrument.py [--size N] [--k K] [--engines E ...]
+                            [--output report.json]
+"""
+
+import argparse
+import json
+import time
+from contextlib import contextmanager
+
+import alphabeta
+import bitboard
+import deepening
+import tictactoe as ttt
+from engines import CLASSIC, ENGINES
+
+# Openings, as move sequences, the suite profiles every engine on
+OPENINGS = {
+    3: [[], [(1, 1)], [(0, 0)], [(0, 0), (1, 1)], [(0, 1), (1, 1), (2, 2)]],
+}
+
+
+class Profile():
+    """
+    Counters for one instrumented search of board.
+    """
+
+    def __init__(self, engine, board):
+        self.engine = engine
+        self.board = board
+        self.bits = bitboard.from_board(board) if len(board) == 3 else None
+        self.stones = sum(cell is not ttt.EMPTY for row in board for cell in row)
+        self.move = None
+        self.seconds = 0.0
+        self.nodes = 0
+        self.terminals = 0
+        self.results = 0
+        # Move -> [seconds, nodes, searches] below that root move
+        self.root_moves = {}
+        self.current = None
+
+    def root_move(self, move):
+        """Attributes the work from now on to root move."""
+        self.close_root_move()
+        self.current = (move, time.perf_counter(), self.nodes)
+
+    def close_root_move(self):
+        if self.current is None:
+            return
+        move, start, nodes = self.current
+        totals = self.root_moves.setdefault(move, [0.0, 0, 0])
+        totals[0] += time.perf_counter() - start
+        totals[1] += self.nodes - nodes
+        totals[2] += 1
+        self.current = None
+
+    def report(self):
+        """Returns the counters as a JSON-serializable dict."""
+        return {
+            "engine": self.engine,
+            "board": ["".join(cell or "." for cell in row) for row in self.board],
+            "move": self.move,
+            "seconds": self.seconds,
+            "nodes": self.nodes,
+            "terminals": self.terminals,
+            "results": self.results,
+            "root_moves": [
+                {"move": list(move), "seconds": seconds, "nodes": nodes,
+                 "searches": searches}
+                for move, (seconds, nodes, searches)
+                in sorted(self.root_moves.items())
+            ],
+        }
+
+
+def _counting(function, counter, profile):
+    def wrapper(*args, **kwargs):
+        setattr(profile, counter, getattr(profile, counter) + 1)
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def _hooks(profile):
+    """
+    Returns (owner, name, wrapper) for every function instrumented
+    while profile runs.
+    """
+    size = len(profile.board)
+    ttt_result = ttt.result
+    bitboard_result = bitboard.result
+    place = deepening.Position.place
+    negamax = deepening.Search.negamax
+
+    def result(board, action):
+        profile.results += 1
+        if board is profile.board:
+            profile.root_move(action)
+        return ttt_result(board, action)
+
+    def bits_result(x, o, cell):
+        profile.results += 1
+        if (x, o) == profile.bits:
+            profile.root_move(divmod(cell, 3))
+        return bitboard_result(x, o, cell)
+
+    def position_place(position, cell, mark):
+        profile.results += 1
+        if position.stones == profile.stones:
+            profile.root_move(divmod(cell, size))
+        won = place(position, cell, mark)
+        if won:
+            profile.terminals += 1
+        return won
+
+    def search_negamax(search, depth, alpha, beta, ply):
+        profile.nodes += 1
+        position = search.position
+        if depth == 0 or position.stones == len(position.cells):
+            profile.terminals += 1
+        return negamax(search, depth, alpha, beta, ply)
+
+    hooks = [
+        (ttt, "result", result),
+        (bitboard, "result", bits_result),
+        (deepening.Position, "place", position_place),
+        (deepening.Search, "negamax", search_negamax),
+    ]
+    for owner, name, counter in (
+        (ttt, "max_value", "nodes"),
+        (ttt, "min_value", "nodes"),
+        (alphabeta.AlphaBeta, "max_value", "nodes"),
+        (alphabeta.AlphaBeta, "min_value", "nodes"),
+        (bitboard, "value", "nodes"),
+        (ttt, "utility", "terminals"),
+        (bitboard, "utility", "terminals"),
+    ):
+        hooks.append(
+            (owner, name, _counting(getattr(owner, name), counter, profile))
+        )
+    return hooks
+
+
+@contextmanager
+def instrumented(profile):
+    """Installs the counting wrappers for profile, removing them after."""
+    hooks = _hooks(profile)
+    saved = [(owner, name, owner.__dict__[name]) for owner, name, _ in hooks]
+    for owner, name, wrapper in hooks:
+        setattr(owner, name, wrapper)
+    try:
+        yield profile
+    finally:
+        for owner, name, original in saved:
+            setattr(owner, name, original)
+
+
+def profile(name, board, engine=None):
+    """
+    Runs the named engine (or engine, if given) on board from cold
+    caches under instrumentation and returns its Profile.
+    """
+    engine = engine or ENGINES[name]
+    if ttt.table is not None:
+        ttt.table.clear()
+    bitboard.value.cache_clear()
+    result = Profile(name, board)
+    with instrumented(result):
+        start = time.perf_counter()
+        move = engine(board)
+        result.seconds = time.perf_counter() - start
+        result.close_root_move()
+    result.move = None if move is None else list(move)
+    return result
+
+
+def openings(size):
+    """Returns the suite's positions for a size x size board."""
+    if size in OPENINGS:
+        sequences = OPENINGS[size]
+    else:
+        middle = size // 2
+        sequences = [[], [(middle, middle)],
+                     [(middle, middle), (middle, middle + 1)]]
+    boards = []
+    for sequence in sequences:
+        board = ttt.initial_state(size)
+        for action in sequence:
+            board = ttt.result(board, action)
+        boards.append(board)
+    return boards
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="instrument.py")
+    parser.add_argument("--size", type=int, default=3, help="board width")
+    parser.add_argument("--k", type=int, help="stones in a row to win")
+    parser.add_argument("--engines", nargs="+", choices=ENGINES,
+                        help="engines to profile (default: all that "
+                             "finish on this board)")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds per move for the deepening engine")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="plies for the parallel engine beyond 3x3")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+    ttt.win_length = args.k
+
+    names = args.engines or [
+        name for name in ENGINES
+        if args.size == 3 or name not in CLASSIC
+    ]
+    depth = None if args.size == 3 else args.depth
+    engines = {
+        "deepening": lambda board: deepening.minimax(board, budget=args.budget),
+        "parallel": lambda board: ENGINES["parallel"](board, depth=depth),
+    }
+
+    runs = []
+    for board in openings(args.size):
+        for name in names:
+            run = profile(name, board, engines.get(name)).report()
+            runs.append(run)
+            print(f"{'/'.join(run['board']):<{args.size * (args.size + 1)}} "
+                  f"{name:<10} move {run['move']}, {run['nodes']} nodes, "
+                  f"{run['terminals']} terminals, {run['results']} results, "
+                  f"{run['seconds']:.3f}s")
+
+    report = {"size": args.size, "k": args.k or args.size, "runs": runs}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Parallel root-split search for N x N, k-in-a-row Tic Tac Toe.
+
+The subtrees below the root moves are independent. The most urgent
+root move is searched here first to establish a bound, and the rest are
+searched to the same depth by a process pool. The best root value found
+so far is kept in shared memory. Each worker reads it before starting a
+move and uses it as alpha, so a move that cannot beat it is refuted as
+cheaply as in the serial search. Positions at the depth cutoff are
+scored with the deepening engine's heuristic.
+
+Usage: python parallel.py [--size N] [--k K] [--depth D] [--workers W ...]
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import deepening
+import tictactoe as ttt
+
+# Best root value found so far, shared by the parent and its workers,
+# and the number of the search it belongs to
+_bound = None
+_generation = None
+
+# (cells, size, k) and Position of the last board searched by a worker
+_cached = None
+
+
+def _init_worker(bound, generation):
+    global _bound, _generation
+    _bound, _generation = bound, generation
+    # A forked worker must not report to the parent's monitor
+    ttt.monitor = None
+
+
+def _score(position, cell, depth, alpha):
+    """
+    Returns the value of root move cell for the player to move, searched
+    to depth with alpha as the lower bound, and the nodes visited.
+    """
+    search = deepening.Search(position, math.inf)
+    if position.place(cell, position.to_move()):
+        value = position.win_score
+    else:
+        value = -search.negamax(depth - 1, -math.inf, -alpha, 1)
+    position.unplace(cell)
+    return value, search.nodes
+
+
+def _search_move(generation, cells, size, k, cell, depth):
+    """
+    Searches one root move in a worker and raises the shared bound if it
+    is better and the search is still current. Returns its value, the
+    alpha it was searched with and the nodes visited.
+    """
+    global _cached
+    key = (cells, size, k)
+    if _cached is None or _cached[0] != key:
+        board = [list(cells[i * size:(i + 1) * size]) for i in range(size)]
+        _cached = (key, deepening.Position(board, k))
+    alpha = _bound.value
+    value, nodes = _score(_cached[1], cell, depth, alpha)
+    with _bound.get_lock():
+        if _generation.value == generation and value > _bound.value:
+            _bound.value = value
+    return value, alpha, nodes
+
+
+class RootSplit():
+    """
+    Process pool that searches root moves in parallel; `nodes` counts
+    the positions visited by the last search.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.bound = multiprocessing.Value("d", -math.inf)
+        # Moves still running from a cancelled search leave the bound
+        # of later searches alone
+        self.generation = multiprocessing.Value("i", 0)
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=_init_worker,
+            initargs=(self.bound, self.generation)
+        )
+        self.nodes = 0
+
+    def minimax(self, board, depth=None, k=None):
+        """
+        Returns the best (i, j) action for the current player, searching
+        depth plies (None: to the end of the game).
+        """
+        size = len(board)
+        k = k or ttt.win_length or size
+        position = deepening.Position(board, k)
+        ordered = position.candidates()
+        if not ordered or position.won:
+            return None
+        ordered.sort(key=position.urgency, reverse=True)
+        empty = sum(1 for cell in position.cells if cell is ttt.EMPTY)
+        depth = min(depth or empty, empty)
+
+        best = ordered[0]
+        best_value, self.nodes = _score(position, best, depth, -math.inf)
+        with self.bound.get_lock():
+            self.generation.value += 1
+            self.bound.value = best_value
+        if best_value >= position.win_score:
+            return divmod(best, size)
+
+        cells = tuple(cell for row in board for cell in row)
+        generation = self.generation.value
+        futures = [
+            self.pool.submit(
+                _search_move, generation, cells, size, k, cell, depth
+            )
+            for cell in ordered[1:]
+        ]
+        try:
+            for cell, future in zip(ordered[1:], futures):
+                value, alpha, nodes = self._result(future)
+                self.nodes += nodes
+                # Values at or below the alpha they were searched with
+                # are only upper bounds and cannot be the best
+                if value > alpha and value > best_value:
+                    best, best_value = cell, value
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        return divmod(best, size)
+
+    @staticmethod
+    def _result(future):
+        """
+        Waits for a worker's result, giving tictactoe.monitor the
+        chance to stop the search meanwhile.
+        """
+        while ttt.monitor is not None and not future.done():
+            ttt.monitor.tick(0)
+            wait([future], timeout=0.05)
+        value, alpha, nodes = future.result()
+        if ttt.monitor is not None:
+            ttt.monitor.tick(nodes)
+        return value, alpha, nodes
+
+    def close(self):
+        self.pool.shutdown()
+
+
+# Pool used by minimax, created on first use
+_splitter = None
+
+
+def minimax(board, depth=None, k=None, workers=None):
+    """
+    Returns the best (i, j) action for the current player, searching the
+    root moves in parallel to depth plies (None: to the end of the game).
+    """
+    global _splitter
+    if _splitter is None or (workers and workers != _splitter.workers):
+        if _splitter is not None:
+            _splitter.close()
+        _splitter = RootSplit(workers)
+    return _splitter.minimax(board, depth=depth, k=k)
+
+
+def serial(board, depth, k):
+    """
+    Returns the move and node count of the serial deepening search at a
+    fixed depth with the same root ordering, for comparison.
+    """
+    position = deepening.Position(board, k)
+    ordered = sorted(position.candidates(), key=position.urgency, reverse=True)
+    search = deepening.Search(position, math.inf)
+    ordered, _ = search.root(depth, ordered)
+    return divmod(ordered[0], len(board)), search.nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="parallel.py")
+    parser.add_argument("--size", type=int, default=7, help="board width")
+    parser.add_argument("--k", type=int, default=4,
+                        help="stones in a row to win")
+    parser.add_argument("--depth", type=int, default=4, help="plies to search")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    # A few opening stones so the root has many candidate moves
+    board = ttt.initial_state(args.size)
+    middle = args.size // 2
+    board[middle][middle] = ttt.X
+    board[middle][middle + 1] = ttt.O
+
+    start = time.perf_counter()
+    move, nodes = serial(board, args.depth, args.k)
+    baseline = time.perf_counter() - start
+    print(f"serial:     move {move}, {nodes} nodes, {baseline:.3f}s")
+    for workers in args.workers:
+        splitter = RootSplit(workers)
+        # Start the worker processes before timing
+        splitter.pool.submit(int).result()
+        start = time.perf_counter()
+        move = splitter.minimax(board, depth=args.depth, k=args.k)
+        elapsed = time.perf_counter() - start
+        splitter.close()
+        print(f"{workers:>2} workers: move {move}, {splitter.nodes} nodes, "
+              f"{elapsed:.3f}s, speedup {baseline / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
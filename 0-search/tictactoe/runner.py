@@ -1,11 +1,60 @@
+import argparse
+import os
 import pygame
 import sys
 import time
 
+import book
+import deepening
+import parallel
 import tictactoe as ttt
+from engines import CLASSIC, ENGINES
+from worker import AIWorker
+
+parser = argparse.ArgumentParser(prog="runner.py")
+parser.add_argument("engine", nargs="?", choices=ENGINES,
+                    help="search engine (default: minimax on 3x3, "
+                         "deepening otherwise)")
+parser.add_argument("--size", type=int, default=3, help="board width")
+parser.add_argument("--k", type=int, help="stones in a row to win")
+parser.add_argument("--budget", type=float, default=1.0,
+                    help="seconds per move for the deepening engine")
+parser.add_argument("--depth", type=int,
+                    help="plies for the parallel engine (default: to the end "
+                         "on 3x3, 3 otherwise)")
+parser.add_argument("--workers", type=int,
+                    help="processes for the parallel engine (default: cores)")
+parser.add_argument("--book", nargs="?", const=book.BOOK, metavar="PATH",
+                    help="answer 3x3 minimax moves from a move table, "
+                         "building it first if missing")
+args = parser.parse_args()
+
+board_size = args.size
+ttt.win_length = args.k
+classic = board_size == 3 and args.k in (None, 3)
+if args.engine is None:
+    args.engine = "minimax" if classic else "deepening"
+if not classic and args.engine in CLASSIC:
+    parser.error(f"the {args.engine} engine only plays 3x3 with 3 in a row")
+if not classic and args.book:
+    parser.error("--book only applies to 3x3 with 3 in a row")
+if args.engine == "deepening":
+    engine = lambda board: deepening.minimax(board, budget=args.budget)
+elif args.engine == "parallel":
+    depth = args.depth or (None if board_size == 3 else 3)
+    engine = lambda board: parallel.minimax(board, depth=depth,
+                                            workers=args.workers)
+else:
+    engine = ENGINES[args.engine]
+if args.book:
+    if not os.path.exists(args.book):
+        book.write(args.book)
+    ttt.load_book(args.book)
 
 pygame.init()
-size = width, height = 600, 400
+tile_size = max(24, min(80, 240 // board_size))
+size = width, height = (max(600, board_size * tile_size + 40),
+                        max(400, board_size * tile_size + 160))
 
 # Colors
 black = (0, 0, 0)
@@ -13,18 +62,21 @@ white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
 
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 18)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = ttt.initial_state(board_size)
+worker = AIWorker(engine)
+clock = pygame.time.Clock()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            worker.cancel()
             sys.exit()
 
     screen.fill(black)
@@ -67,13 +119,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (board_size / 2 * tile_size),
+                       height / 2 - (board_size / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(board_size):
             row = []
-            for j in range(3):
+            for j in range(board_size):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -108,22 +159,44 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, searched in the background
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if worker.idle:
+                worker.start(board)
+            elif worker.done:
+                board = ttt.result(board, worker.take())
+
+        # Show search progress and let the user abandon the game
+        if worker.thinking:
+            progress = smallFont.render(
+                f"{worker.nodes:,} nodes searched, {worker.elapsed():.1f}s",
+                True, white
+            )
+            progressRect = progress.get_rect()
+            progressRect.center = ((width / 2), 65)
+            screen.blit(progress, progressRect)
+
+            resetButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+            reset = mediumFont.render("Reset", True, black)
+            resetRect = reset.get_rect()
+            resetRect.center = resetButton.center
+            pygame.draw.rect(screen, white, resetButton)
+            screen.blit(reset, resetRect)
+            click, _, _ = pygame.mouse.get_pressed()
+            if click == 1:
+                mouse = pygame.mouse.get_pos()
+                if resetButton.collidepoint(mouse):
+                    time.sleep(0.2)
+                    worker.cancel()
+                    user = None
+                    board = ttt.initial_state(board_size)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(board_size):
+                for j in range(board_size):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -140,7 +213,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = ttt.initial_state(board_size)
 
     pygame.display.flip()
+    clock.tick(60)
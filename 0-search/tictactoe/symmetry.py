@@ -0,0 +1,66 @@
+"""
+Node counts of tictactoe.minimax with and without symmetry reduction.
+
+With tictactoe.symmetric set, the transposition table is keyed by each
+position's canonical form, so a position and its seven rotations and
+reflections share one entry and one search.
+
+Usage: python symmetry.py [--size N] [--k K]
+"""
+
+import argparse
+import time
+
+import tictactoe as ttt
+
+
+def search_stats(board, symmetric):
+    """
+    Runs minimax on board from an empty transposition table and returns
+    its move, the number of max_value/min_value calls, the number of
+    positions expanded and the time taken.
+    """
+    max_value, min_value = ttt.max_value, ttt.min_value
+    calls = 0
+
+    def counted(search):
+        def wrapper(board):
+            nonlocal calls
+            calls += 1
+            return search(board)
+        return wrapper
+
+    saved = ttt.symmetric, ttt.book
+    ttt.symmetric, ttt.book = symmetric, None
+    ttt.table.clear()
+    ttt.max_value, ttt.min_value = counted(max_value), counted(min_value)
+    try:
+        start = time.perf_counter()
+        move = ttt.minimax(board)
+        elapsed = time.perf_counter() - start
+    finally:
+        ttt.max_value, ttt.min_value = max_value, min_value
+        ttt.symmetric, ttt.book = saved
+    expanded = ttt.table.misses
+    ttt.table.clear()
+    return {"move": move, "nodes": calls, "expanded": expanded,
+            "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="symmetry.py")
+    parser.add_argument("--size", type=int, default=3, help="board width")
+    parser.add_argument("--k", type=int, help="stones in a row to win")
+    args = parser.parse_args()
+    ttt.win_length = args.k
+
+    board = ttt.initial_state(args.size)
+    for symmetric in (False, True):
+        stats = search_stats(board, symmetric)
+        label = "symmetric:" if symmetric else "plain:    "
+        print(f"{label} move {stats['move']}, {stats['nodes']} nodes, "
+              f"{stats['expanded']} expanded, {stats['seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
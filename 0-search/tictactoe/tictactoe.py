@@ -3,20 +3,196 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+from functools import lru_cache
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Stones in a row needed to win; None means the board's width
+win_length = None
 
-def initial_state():
+# Whether search caches positions under their canonical form, so the
+# eight rotations and reflections of a board are evaluated once
+symmetric = False
+
+# Digit of each cell value in a board's base-3 encoding
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+
+
+class TranspositionTable():
+    """
+    Cache of exact minimax values keyed by board size, win length and
+    board encoding.
+
+    When maxsize is set and the table is full, the oldest entry is
+    evicted to make room.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        """Returns the cached value for key, or None."""
+        value = self.values.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, key, value):
+        if self.maxsize is not None:
+            if self.maxsize <= 0:
+                return
+            if key not in self.values and len(self.values) >= self.maxsize:
+                del self.values[next(iter(self.values))]
+        self.values[key] = value
+
+    def clear(self):
+        """Drops every entry and resets the counters."""
+        self.values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def stats(self):
+        """Returns hits, misses, hit rate and size as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.values),
+            "maxsize": self.maxsize,
+        }
+
+
+# Values of positions already searched by max_value/min_value;
+# set to None to search without caching
+table = TranspositionTable()
+
+# Object whose tick() is called at every position an engine searches,
+# to report progress or stop the search by raising; None when unused
+monitor = None
+
+# Perfect-play move table for the 3x3 game, indexed by encode(board);
+# see load_book and book.py
+book = None
+BOOK_MAGIC = b"TTTBOOK1"
+NO_MOVE = 0xFF
+
+
+def encode(board):
+    """
+    Returns the base-3 integer of the board's cells in row-major order,
+    which identifies the position uniquely.
+    """
+    code = 0
+    for row in board:
+        for cell in row:
+            code = code * 3 + DIGITS[cell]
+    return code
+
+
+@lru_cache(maxsize=None)
+def symmetries(size):
+    """
+    Returns the eight rotations and reflections of a size x size board
+    as tuples of flat cell indices: cell c of the transformed board is
+    cell symmetry[c] of the original.
+    """
+    last = size - 1
+    maps = (
+        lambda i, j: (i, j), lambda i, j: (j, last - i),
+        lambda i, j: (last - i, last - j), lambda i, j: (last - j, i),
+        lambda i, j: (i, last - j), lambda i, j: (last - i, j),
+        lambda i, j: (j, i), lambda i, j: (last - j, last - i),
+    )
+    return tuple(
+        tuple(a * size + b for i in range(size) for j in range(size)
+              for a, b in (f(i, j),))
+        for f in maps
+    )
+
+
+def canonical(board):
+    """
+    Returns the smallest encoding among the board's rotations and
+    reflections, shared by every board in its symmetry class.
+    """
+    digits = [DIGITS[cell] for row in board for cell in row]
+    best = None
+    for symmetry in symmetries(len(board)):
+        code = 0
+        for c in symmetry:
+            code = code * 3 + digits[c]
+        if best is None or code < best:
+            best = code
+    return best
+
+
+def position_key(board):
+    """Returns the transposition table key of board."""
+    code = canonical(board) if symmetric else encode(board)
+    return (len(board), win_length, code)
+
+
+def load_book(path):
+    """
+    Loads a move table written by book.py so that minimax answers 3x3
+    positions with a single lookup. Returns the table.
+    """
+    global book
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(BOOK_MAGIC) or len(data) != len(BOOK_MAGIC) + 3 ** 9:
+        raise ValueError(f"{path} is not a tictactoe move table")
+    book = data[len(BOOK_MAGIC):]
+    return book
+
+
+def book_move(board):
+    """
+    Returns the book's (i, j) action for board, or None if no book is
+    loaded, the game is not plain 3x3 or the position is not in it.
+    """
+    if book is None or len(board) != 3 or win_length not in (None, 3):
+        return None
+    cell = book[encode(board)]
+    if cell == NO_MOVE:
+        return None
+    return divmod(cell, 3)
+
+
+def initial_state(size=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * size for _ in range(size)]
+
+
+@lru_cache(maxsize=None)
+def lines(size, k):
+    """
+    Returns every run of k cells in a row, column or diagonal of a
+    size x size board, as tuples of (i, j) cells.
+    """
+    runs = []
+    for i in range(size):
+        for j in range(size):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                if 0 <= end_i < size and 0 <= end_j < size:
+                    runs.append(tuple(
+                        (i + di * step, j + dj * step) for step in range(k)
+                    ))
+    return tuple(runs)
 
 
 def player(board):
@@ -59,11 +235,13 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    if action not in actions(board):
+    i, j = action
+    if not (0 <= i < len(board) and 0 <= j < len(board)) \
+            or board[i][j] is not EMPTY:
         raise Exception('Action is not valid')
 
-    new_board = copy.deepcopy(board)
-    new_board[action[0]][action[1]] = player(board)
+    new_board = [row[:] for row in board]
+    new_board[i][j] = player(board)
 
     return new_board
 
@@ -72,21 +250,13 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    
-    # check rows
-    board_t = [[board[j][i] for j in range(len(board))] for i in range(len(board[0]))]
-
-    # check diagonals
-    diagonals = [
-        [board[0][0], board[1][1], board[2][2]],
-        [board[0][2], board[1][1], board[2][0]]
-    ]
-
-    all_combinations = board + board_t + diagonals
-    for row in all_combinations:    
-        if all(item is row[0] for item in row):
-            return row[0]
-        
+    k = win_length or len(board)
+    for line in lines(len(board), k):
+        i, j = line[0]
+        first = board[i][j]
+        if first is not EMPTY and all(board[i][j] is first for i, j in line):
+            return first
+
     return EMPTY
 
 
@@ -118,11 +288,28 @@ def minimax(board):
     X is Max player
     O is Min player
     """
+    move = book_move(board)
+    if move is not None:
+        return move
+
+    # With symmetric set, replies that are rotations or reflections of
+    # one another are searched once; moves still come from this board
+    # in row-major order, so they are in its orientation
+    searched = {}
+
+    def child_value(action, search):
+        child = result(board, action)
+        if not symmetric:
+            return search(child)
+        code = canonical(child)
+        if code not in searched:
+            searched[code] = search(child)
+        return searched[code]
 
     if player(board) == X: # X must maximise
         v = -math.inf
         for action in actions(board):
-            tmp = min_value(result(board, action))
+            tmp = child_value(action, min_value)
             if tmp > v:
                 v = tmp
                 opt_action = action
@@ -130,7 +317,7 @@ def minimax(board):
     else: # O must minimize score
         v = math.inf
         for action in actions(board):
-            tmp = max_value(result(board, action))
+            tmp = child_value(action, max_value)
             if tmp < v:
                 v = tmp
                 opt_action = action
@@ -138,18 +325,36 @@ def minimax(board):
     return opt_action
 
 def max_value(board):
+    if monitor is not None:
+        monitor.tick()
     if terminal(board):
         return utility(board)
+    if table is not None:
+        key = position_key(board)
+        v = table.lookup(key)
+        if v is not None:
+            return v
     v = -math.inf
     for action in actions(board):
         v = max(v, min_value(result(board, action)))
+    if table is not None:
+        table.store(key, v)
     return v
 
 def min_value(board):
+    if monitor is not None:
+        monitor.tick()
     if terminal(board):
         return utility(board)
+    if table is not None:
+        key = position_key(board)
+        v = table.lookup(key)
+        if v is not None:
+            return v
     v = math.inf
     for action in actions(board):
         v = min(v, max_value(result(board, action)))
+    if table is not None:
+        table.store(key, v)
     return v
     
@@ -0,0 +1,117 @@
+"""
+Background AI moves for the runner.
+
+AIWorker runs an engine on a daemon thread so the pygame loop keeps
+drawing and handling events while the computer thinks. Engines report
+every position they search to tictactoe.monitor; the worker's Monitor
+counts them for the progress display and stops the search by raising
+Cancelled once the move is no longer wanted.
+"""
+
+import threading
+import time
+
+import tictactoe as ttt
+
+
+class Cancelled(Exception):
+    pass
+
+
+class Monitor():
+    """
+    Counts the positions one search visits and raises Cancelled from
+    tick() after cancel() has been called.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.cancelled = False
+
+    def tick(self, nodes=1):
+        self.nodes += nodes
+        if self.cancelled:
+            raise Cancelled()
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class AIWorker():
+    """
+    Computes one move at a time on a background thread.
+
+    The worker is idle until start(board); it is then thinking until the
+    engine returns, when done is True and take() hands over the move.
+    cancel() abandons the search and makes the worker idle again.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.thread = None
+        self.monitor = None
+        self.started = None
+        self.move = None
+        self.error = None
+
+    @property
+    def idle(self):
+        return self.thread is None
+
+    @property
+    def thinking(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def done(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    @property
+    def nodes(self):
+        return self.monitor.nodes if self.monitor is not None else 0
+
+    def elapsed(self):
+        """Returns the seconds since the current search started."""
+        return time.perf_counter() - self.started if self.started else 0.0
+
+    def start(self, board):
+        """Starts searching a copy of board, abandoning any other search."""
+        self.cancel()
+        self.monitor = Monitor()
+        self.move = self.error = None
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(
+            target=self._run, args=([row[:] for row in board], self.monitor),
+            daemon=True
+        )
+        self.thread.start()
+
+    def _run(self, board, monitor):
+        ttt.monitor = monitor
+        try:
+            self.move = self.engine(board)
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.error = e
+        finally:
+            ttt.monitor = None
+
+    def take(self):
+        """
+        Returns the move of a finished search, re-raising any error the
+        engine raised, and makes the worker idle.
+        """
+        self.thread.join()
+        self.thread = None
+        if self.error is not None:
+            raise self.error
+        return self.move
+
+    def cancel(self):
+        """Stops the current search, if any, and waits for it to end."""
+        if self.thread is None:
+            return
+        self.monitor.cancel()
+        self.thread.join()
+        self.thread = None
@@ -15,6 +15,36 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def source(self, index):
+        """
+        Returns a Python expression evaluating the sentence, in which
+        symbol name is the argument p{index[name]}.
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols=None):
+        """
+        Returns a function taking one boolean per symbol, positionally
+        in the order of symbols (default: sorted symbol names), that
+        evaluates the sentence.
+
+        Sentences nested too deeply for one Python expression (the
+        parser gives up at about 200 levels of parentheses) are instead
+        evaluated by walking the tree.
+        """
+        if symbols is None:
+            symbols = sorted(self.symbols())
+        symbols = list(symbols)
+        index = {name: i for i, name in enumerate(symbols)}
+        arguments = ", ".join(f"p{i}" for i in range(len(symbols)))
+        try:
+            function = eval(f"lambda {arguments}: {self.source(index)}")
+        except (SyntaxError, RecursionError, MemoryError):
+            def function(*values):
+                return self.evaluate(dict(zip(symbols, values)))
+        function.symbols = symbols
+        return function
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +98,12 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def source(self, index):
+        try:
+            return f"p{index[self.name]}"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +128,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def source(self, index):
+        return f"(not {self.operand.source(index)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +168,13 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def source(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.source(index) for conjunct in self.conjuncts
+        ) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +206,13 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def source(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.source(index) for disjunct in self.disjuncts
+        ) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +244,11 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def source(self, index):
+        antecedent = self.antecedent.source(index)
+        consequent = self.consequent.source(index)
+        return f"(not {antecedent} or {consequent})"
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,9 +282,28 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def source(self, index):
+        # Each side is evaluated once
+        return f"({self.left.source(index)} == {self.right.source(index)})"
+
+
+def model_check(knowledge, query, compiled=True):
+    """
+    Checks if knowledge base entails query.
+
+    With compiled set, both sentences are compiled to functions of
+    positional booleans and evaluated over every model; otherwise each
+    model is a dict and the sentence trees are walked.
+    """
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    if compiled:
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        knowledge_holds = knowledge.compile(symbols)
+        query_holds = query.compile(symbols)
+        for model in itertools.product((True, False), repeat=len(symbols)):
+            if knowledge_holds(*model) and not query_holds(*model):
+                return False
+        return True
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
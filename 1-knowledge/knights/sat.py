@@ -0,0 +1,416 @@
+"""
+SAT-based entailment for the sentences of logic.py.
+
+model_check enumerates all 2^n models, which stops being usable past
+about 25 symbols. Here a knowledge base is converted to clauses with
+the Tseitin encoding, and entailment is decided by a CDCL solver:
+KB entails query exactly when KB and Not(query) have no model
+together. Answers are the same as model_check's.
+
+Clauses use DIMACS-style literals: variable v is the literal v when
+true and -v when false.
+"""
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+class CNF():
+    """
+    Clauses equisatisfiable with the sentences added.
+
+    Every compound subsentence gets a fresh variable with clauses that
+    make it equivalent to the subsentence, so the clauses grow linearly
+    with the sentences. Subsentences with the same operator over the
+    same literals share one variable.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        # Symbol name -> variable
+        self.variables = {}
+        # (operator, literals) -> literal of an encoded subsentence
+        self.definitions = {}
+        self.true = None
+
+    def new_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def variable(self, name):
+        """Returns the variable of the symbol called name."""
+        if name not in self.variables:
+            self.variables[name] = self.new_var()
+        return self.variables[name]
+
+    def constant(self, value):
+        """Returns a literal that is always value."""
+        if self.true is None:
+            self.true = self.new_var()
+            self.clauses.append([self.true])
+        return self.true if value else -self.true
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to sentence, adding the clauses
+        that define it.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if isinstance(sentence, And):
+            return self.conjunction(
+                [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            )
+        if isinstance(sentence, Or):
+            return self.disjunction(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        if isinstance(sentence, Implication):
+            return self.disjunction([-self.literal(sentence.antecedent),
+                                     self.literal(sentence.consequent)])
+        if isinstance(sentence, Biconditional):
+            return self.equivalence(self.literal(sentence.left),
+                                    self.literal(sentence.right))
+        raise TypeError(f"cannot convert {type(sentence).__name__} to CNF")
+
+    def conjunction(self, literals):
+        """Returns a literal equivalent to the conjunction of literals."""
+        if not literals:
+            return self.constant(True)
+        if len(literals) == 1:
+            return literals[0]
+        key = ("and", tuple(literals))
+        if key not in self.definitions:
+            v = self.new_var()
+            for lit in literals:
+                self.clauses.append([-v, lit])
+            self.clauses.append([v] + [-lit for lit in literals])
+            self.definitions[key] = v
+        return self.definitions[key]
+
+    def disjunction(self, literals):
+        """Returns a literal equivalent to the disjunction of literals."""
+        # a or b is not (not a and not b)
+        return -self.conjunction([-lit for lit in literals]) \
+            if literals else self.constant(False)
+
+    def equivalence(self, a, b):
+        """Returns a literal that is true when a and b are equal."""
+        key = ("iff", a, b)
+        if key not in self.definitions:
+            v = self.new_var()
+            self.clauses.extend(([-v, -a, b], [-v, a, -b],
+                                 [v, a, b], [v, -a, -b]))
+            self.definitions[key] = v
+        return self.definitions[key]
+
+    def add(self, sentence):
+        """
+        Adds clauses that hold exactly when sentence does (for some
+        values of the fresh variables).
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.clauses.append([-self.literal(sentence.antecedent),
+                                 self.literal(sentence.consequent)])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+
+class Solver():
+    """
+    Conflict-driven clause learning SAT solver.
+
+    Unit propagation uses two watched literals per clause, so assigning
+    a literal only visits the clauses watching its negation. Conflicts
+    are analysed to the first unique implication point; the learnt
+    clause is kept and the search jumps back to the level where it
+    becomes unit. Branching picks the unassigned variable most involved
+    in recent conflicts, with its last value.
+    """
+
+    DECAY = 0.95
+
+    def __init__(self, num_vars=0):
+        self.num_vars = 0
+        self.clauses = []
+        # Literal -> indices of clauses watching it
+        self.watches = {}
+        # Per variable: 1 true, -1 false, 0 unassigned
+        self.assign = [0]
+        self.level = [0]
+        # Index of the clause that implied the variable, or None
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [-1]
+        self.trail = []
+        # Trail length at the start of each decision level
+        self.trail_lim = []
+        self.qhead = 0
+        self.increment = 1.0
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+        self.model = None
+        self.grow(num_vars)
+
+    def grow(self, num_vars):
+        """Makes room for variables up to num_vars."""
+        while self.num_vars < num_vars:
+            self.num_vars += 1
+            v = self.num_vars
+            self.assign.append(0)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.phase.append(-1)
+            self.watches[v] = []
+            self.watches[-v] = []
+
+    def value(self, lit):
+        """Returns 1 if lit is true, -1 if false and 0 if unassigned."""
+        return self.assign[lit] if lit > 0 else -self.assign[-lit]
+
+    def add_clause(self, literals):
+        """
+        Adds a clause between searches. Returns False if the clauses
+        have become unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.grow(max(abs(lit) for lit in literals) if literals else 0)
+        clause = []
+        for lit in literals:
+            value = self.value(lit)
+            if value > 0 or -lit in clause:
+                # Satisfied at level 0, or a tautology
+                return True
+            if value == 0 and lit not in clause:
+                clause.append(lit)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        """Stores clause, watching its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def enqueue(self, lit, reason):
+        v = abs(lit)
+        self.assign[v] = 1 if lit > 0 else -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses. Returns the index
+        of a clause left with all literals false, or None.
+        """
+        trail = self.trail
+        clauses = self.clauses
+        watches = self.watches
+        assign = self.assign
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            watchers = watches[false_lit]
+            kept = []
+            for position, index in enumerate(watchers):
+                clause = clauses[index]
+                # Keep the false watch at position 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = assign[first] if first > 0 else -assign[-first]
+                if first_value > 0:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (assign[lit] if lit > 0 else -assign[-lit]) >= 0:
+                        clause[1], clause[k] = lit, false_lit
+                        watches[lit].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first_value < 0:
+                        kept.extend(watchers[position + 1:])
+                        watches[false_lit] = kept
+                        self.qhead = len(trail)
+                        return index
+                    self.enqueue(first, index)
+            watches[false_lit] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learnt from a conflict, asserting literal
+        first, and the level to jump back to.
+        """
+        level = self.level
+        current = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for q in (clause if lit is None else clause[1:]):
+                v = abs(q)
+                if v not in seen and level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if level[v] >= current:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            # Walk back to the most recent literal involved
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reason[abs(lit)]]
+        learnt[0] = -lit
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal from the highest earlier level second
+        deepest = max(range(1, len(learnt)), key=lambda i: level[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, level[abs(learnt[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+
+    def cancel_until(self, level):
+        """Undoes every assignment above decision level."""
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            v = abs(lit)
+            self.phase[v] = self.assign[v]
+            self.assign[v] = 0
+            self.reason[v] = None
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def branch(self):
+        """Returns the literal to decide next, or None if all are set."""
+        best = None
+        best_activity = -1.0
+        assign = self.assign
+        activity = self.activity
+        for v in range(1, self.num_vars + 1):
+            if assign[v] == 0 and activity[v] > best_activity:
+                best, best_activity = v, activity[v]
+        if best is None:
+            return None
+        return best if self.phase[best] > 0 else -best
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses have a model in which every literal
+        of assumptions is true, storing it in `model` (indexed by
+        variable), and False otherwise.
+        """
+        if not self.ok:
+            return False
+        self.grow(max((abs(lit) for lit in assumptions), default=0))
+        try:
+            while True:
+                conflict = self.propagate()
+                if conflict is not None:
+                    if not self.trail_lim:
+                        self.ok = False
+                        return False
+                    learnt, level = self.analyze(conflict)
+                    self.cancel_until(level)
+                    if len(learnt) == 1:
+                        self.enqueue(learnt[0], None)
+                    else:
+                        self.enqueue(learnt[0], self.attach(learnt))
+                    self.increment /= self.DECAY
+                    continue
+
+                depth = len(self.trail_lim)
+                if depth < len(assumptions):
+                    lit = assumptions[depth]
+                    value = self.value(lit)
+                    if value < 0:
+                        return False
+                    self.trail_lim.append(len(self.trail))
+                    if value == 0:
+                        self.enqueue(lit, None)
+                    continue
+
+                lit = self.branch()
+                if lit is None:
+                    self.model = [value > 0 for value in self.assign]
+                    return True
+                self.trail_lim.append(len(self.trail))
+                self.enqueue(lit, None)
+        finally:
+            self.cancel_until(0)
+
+
+class KnowledgeBase():
+    """
+    A sentence converted to clauses once, against which any number of
+    queries can be checked; clauses learnt for one query speed up the
+    next.
+    """
+
+    def __init__(self, knowledge):
+        self.cnf = CNF()
+        self.cnf.add(knowledge)
+        self.solver = Solver()
+        self.fed = 0
+
+    def sync(self):
+        """Passes clauses the solver has not seen yet to it."""
+        self.solver.grow(self.cnf.num_vars)
+        for clause in self.cnf.clauses[self.fed:]:
+            self.solver.add_clause(clause)
+        self.fed = len(self.cnf.clauses)
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        lit = self.cnf.literal(query)
+        self.sync()
+        return not self.solver.solve([-lit])
+
+    def satisfiable(self):
+        """Checks if the knowledge base has a model."""
+        self.sync()
+        return self.solver.solve()
+
+
+def sat_check(knowledge, query):
+    """Checks if knowledge base entails query, like model_check."""
+    return KnowledgeBase(knowledge).entails(query)